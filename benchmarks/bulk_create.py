@@ -0,0 +1,113 @@
+"""
+Compares peak RSS and rows/sec of Product.bulk_create fed with model
+instances (one Product per row, as the ETL loaders used to build) against a
+columnar batch.
+
+    python -m benchmarks.bulk_create --rows 1000000
+
+Each path runs in its own process so peak RSS is not shared. Uses a
+throwaway SQLite file unless DATABASE_URL points somewhere else (its tables
+are dropped and recreated).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# A single INSERT .. VALUES statement is capped by the driver's bind parameter
+# limit (32767 for asyncpg), so instances are inserted in chunks of this size
+MODEL_CHUNK = 5000
+
+
+def make_columns(rows: int) -> dict[str, list]:
+    now = datetime.now()
+    return {
+        "name": [f"Product {i}" for i in range(rows)],
+        "price": [float(i % 1000) for i in range(rows)],
+        "created_at": [now] * rows,
+        "updated_at": [now] * rows,
+        "catalog_id": [1] * rows,
+    }
+
+
+async def run(path: str, rows: int) -> dict:
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlmodel import SQLModel
+
+    from models import Catalog, Product
+
+    engine = create_async_engine(os.environ["DATABASE_URL"])
+
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.drop_all)
+        await conn.run_sync(SQLModel.metadata.create_all)
+    session = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+
+    columns = make_columns(rows)
+    async with session() as db:
+        await Catalog.create(db, name="Benchmark")
+
+        started = time.perf_counter()
+        if path == "models":
+            products = [
+                Product(**dict(zip(columns, values)))
+                for values in zip(*columns.values())
+            ]
+            for start in range(0, rows, MODEL_CHUNK):
+                await Product.bulk_create(db, products[start : start + MODEL_CHUNK])
+        else:
+            await Product.bulk_create(db, columns)
+        elapsed = time.perf_counter() - started
+
+    await engine.dispose()
+    return {
+        "path": path,
+        "rows": rows,
+        "seconds": round(elapsed, 2),
+        "rows_per_sec": round(rows / elapsed),
+        # ru_maxrss is in KiB on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--path", choices=["models", "columnar"])
+    args = parser.parse_args()
+
+    if args.path:
+        print(json.dumps(asyncio.run(run(args.path, args.rows))))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {"DATABASE_URL": f"sqlite+aiosqlite:///{tmp}/bench.db", **os.environ}
+        for path in ("models", "columnar"):
+            result = subprocess.run(
+                [
+                    sys.executable,
+                    "-m",
+                    "benchmarks.bulk_create",
+                    "--rows",
+                    str(args.rows),
+                    "--path",
+                    path,
+                ],
+                env=env,
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            print(result.stdout.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Measures requests/sec of read endpoints with 1 to N server workers.
+
+    python -m benchmarks.workers --workers 1 2 4 --seconds 10
+
+Each run starts `uvicorn main:app --workers N` against the same seeded
+database and drives it with `--concurrency` concurrent clients for
+`--seconds`, hitting `/catalogs`, `/products/top-products` and `/products`.
+Uses a throwaway SQLite file unless DATABASE_URL points somewhere else (its
+tables are dropped and recreated). The load generator runs on the same
+machine and takes CPU from the server, so compare runs with each other
+rather than with production numbers.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+PATHS = (
+    "/api/v1/catalogs?limit=20",
+    "/api/v1/products/top-products?top_n=10",
+    "/api/v1/products?limit=20",
+)
+
+
+async def seed(catalogs: int, products: int):
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlmodel import SQLModel
+
+    from models import Catalog, Product
+
+    engine = create_async_engine(os.environ["DATABASE_URL"])
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.drop_all)
+        await conn.run_sync(SQLModel.metadata.create_all)
+    session = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    now = datetime.now()
+    async with session() as db:
+        await Catalog.bulk_create(
+            db,
+            {
+                "name": [f"Catalog {i}" for i in range(catalogs)],
+                "created_at": [now] * catalogs,
+            },
+        )
+        await Product.bulk_create(
+            db,
+            {
+                "name": [f"Product {i}" for i in range(products)],
+                "price": [float(i % 997) for i in range(products)],
+                "catalog_id": [i % catalogs + 1 for i in range(products)],
+            },
+        )
+    await engine.dispose()
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def wait_ready(client, url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get(url)).status_code == 200:
+                return
+        except Exception:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError(f"Server did not answer {url} within {timeout}s")
+
+
+async def drive(base_url: str, concurrency: int, seconds: float) -> dict:
+    import httpx
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(
+        base_url=base_url, limits=limits, timeout=30
+    ) as client:
+        await wait_ready(client, PATHS[0])
+        latencies, errors = [], 0
+        deadline = time.monotonic() + seconds
+
+        async def user(offset: int):
+            nonlocal errors
+            i = offset
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                response = await client.get(PATHS[i % len(PATHS)])
+                latencies.append(time.perf_counter() - started)
+                errors += response.status_code != 200
+                i += 1
+
+        started = time.monotonic()
+        await asyncio.gather(*(user(i) for i in range(concurrency)))
+        elapsed = time.monotonic() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 1),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 1),
+    }
+
+
+def run(workers: int, args) -> dict:
+    port = free_port()
+    env = {
+        **os.environ,
+        "WORKERS": str(workers),
+        "DB_STARTUP_MODE": "skip",
+        # Measure the server, not the request limiter
+        "ADMISSION_ENABLED": "false",
+    }
+    if args.no_shared_cache:
+        env["SHARED_CACHE_ENABLED"] = "false"
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "main:app",
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+            "--log-level",
+            "warning",
+        ],
+        env=env,
+    )
+    try:
+        result = asyncio.run(
+            drive(f"http://127.0.0.1:{port}", args.concurrency, args.seconds)
+        )
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+    return {"workers": workers, **result}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--catalogs", type=int, default=100)
+    parser.add_argument("--products", type=int, default=50_000)
+    parser.add_argument("--no-shared-cache", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{tmp}/bench.db")
+        asyncio.run(seed(args.catalogs, args.products))
+        print(json.dumps({"cpus": os.cpu_count()}))
+        for workers in args.workers:
+            print(json.dumps(run(workers, args)), flush=True)
+
+
+if __name__ == "__main__":
+    main()
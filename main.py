@@ -1,13 +1,40 @@
+import os
+import sys
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 
-from routers import products_router, catalogs_router
+from routers import (
+    products_router,
+    catalogs_router,
+    changes_router,
+    etl_router,
+    system_router,
+)
+from services.admission import AdmissionMiddleware, admission
+from services.config import settings
 from services.engine import init_db
+from services.profiling import ProfilingMiddleware, profile_store, sampler
+
+
+def configure_logging():
+    """
+    Sets the level of the loguru handler, per-row ETL messages are DEBUG.
+    loguru is only imported by the first ETL request, until then the level is
+    passed through the variable it reads on import.
+    """
+    if "loguru" in sys.modules:
+        from loguru import logger
+
+        logger.remove()
+        logger.add(sys.stderr, level=settings.LOG_LEVEL)
+    else:
+        os.environ["LOGURU_LEVEL"] = settings.LOG_LEVEL
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):  # noqa: Shadows name 'app' from outer scope
+    configure_logging()
     await init_db()
     yield
 
@@ -15,3 +42,18 @@ async def lifespan(app: FastAPI):  # noqa: Shadows name 'app' from outer scope
 app = FastAPI(lifespan=lifespan, docs_url="/")
 app.include_router(catalogs_router)
 app.include_router(products_router)
+app.include_router(changes_router)
+app.include_router(etl_router)
+app.include_router(system_router)
+
+if settings.PROFILING_TOKEN or settings.PROFILING_SAMPLE_RATE:
+    # Added before admission so queueing time is not part of the profile
+    app.add_middleware(
+        ProfilingMiddleware,
+        store=profile_store,
+        sampler=sampler,
+        token=settings.PROFILING_TOKEN,
+        sample_rate=settings.PROFILING_SAMPLE_RATE,
+    )
+if settings.ADMISSION_ENABLED:
+    app.add_middleware(AdmissionMiddleware, controller=admission)
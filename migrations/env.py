@@ -6,6 +6,7 @@ from sqlalchemy import pool
 from alembic import context
 
 from services.config import settings
+from services.migrate import sync_url
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -30,10 +31,7 @@ target_metadata = SQLModel.metadata
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
 # ... etc.
-database_url = settings.DATABASE_URL
-if database_url.startswith("postgresql+asyncpg"):
-    database_url = database_url.replace("postgresql+asyncpg", "postgresql+psycopg2")
-config.set_main_option("sqlalchemy.url", database_url)
+config.set_main_option("sqlalchemy.url", sync_url(settings.DATABASE_URL))
 
 
 def run_migrations_offline() -> None:
@@ -67,6 +65,14 @@ def run_migrations_online() -> None:
     and associate a connection with the context.
 
     """
+    # services.migrate hands over the connection it inspected the database on
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        context.configure(connection=connection, target_metadata=target_metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+
     connectable = engine_from_config(
         config.get_section(config.config_ini_section, {}),
         prefix="sqlalchemy.",
@@ -0,0 +1,40 @@
+"""product dedup key
+
+Revision ID: 28d047386b23
+Revises: 6af4404949a0
+Create Date: 2026-10-19 14:05:47.530912
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = "28d047386b23"
+down_revision: Union[str, Sequence[str], None] = "6af4404949a0"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing products keep a NULL key, which the unique index allows
+    op.add_column("product", sa.Column("dedup_key", sa.BigInteger(), nullable=True))
+    with op.get_context().autocommit_block():
+        op.create_index(
+            op.f("ix_product_dedup_key"),
+            "product",
+            ["dedup_key"],
+            unique=True,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_product_dedup_key"), table_name="product")
+    op.drop_column("product", "dedup_key")
@@ -0,0 +1,40 @@
+"""catalog soft delete and product catalog index
+
+Revision ID: 7610c9c2948a
+Revises: c6a172b4d8f7
+Create Date: 2026-10-19 09:12:31.402118
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7610c9c2948a"
+down_revision: Union[str, Sequence[str], None] = "c6a172b4d8f7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("catalog", sa.Column("deleted_at", sa.DateTime(), nullable=True))
+    # Build the index without blocking writes to a large product table
+    with op.get_context().autocommit_block():
+        op.create_index(
+            op.f("ix_product_catalog_id"),
+            "product",
+            ["catalog_id"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_product_catalog_id"), table_name="product")
+    op.drop_column("catalog", "deleted_at")
@@ -0,0 +1,96 @@
+"""backfill product dedup key
+
+Revision ID: 9e3b51c07a4d
+Revises: 28d047386b23
+Create Date: 2026-10-19 16:42:10.118204
+
+"""
+
+import logging
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from shared.dedup import dedup_key, normalize_name
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9e3b51c07a4d"
+down_revision: Union[str, Sequence[str], None] = "28d047386b23"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 10_000
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+product = sa.table(
+    "product",
+    sa.column("product_id", sa.Integer),
+    sa.column("name", sa.String),
+    sa.column("catalog_id", sa.Integer),
+    sa.column("dedup_key", sa.BigInteger),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keys the products stored before 28d047386b23. Of products already
+    # sharing a name in a catalog, the first one is keyed and the others
+    # keep a NULL key, they are only counted.
+    connection = op.get_bind()
+    keyed = duplicates = last_id = 0
+    set_key = (
+        product.update()
+        .where(product.c.product_id == sa.bindparam("id"))
+        .values(dedup_key=sa.bindparam("key"))
+    )
+    # Every batch commits on its own, the table is never locked for the run
+    with op.get_context().autocommit_block():
+        while True:
+            rows = connection.execute(
+                sa.select(product.c.product_id, product.c.name, product.c.catalog_id)
+                .where(product.c.dedup_key.is_(None), product.c.product_id > last_id)
+                .order_by(product.c.product_id)
+                .limit(BATCH_SIZE)
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1].product_id
+
+            keys = {
+                row.product_id: dedup_key(normalize_name(row.name), row.catalog_id)
+                for row in rows
+            }
+            taken = set(
+                connection.scalars(
+                    sa.select(product.c.dedup_key).where(
+                        product.c.dedup_key.in_(set(keys.values()))
+                    )
+                )
+            )
+            updates = []
+            for product_id, key in keys.items():
+                if key in taken:
+                    duplicates += 1
+                    continue
+                taken.add(key)
+                updates.append({"id": product_id, "key": key})
+            if updates:
+                connection.execute(set_key, updates)
+                keyed += len(updates)
+
+    logger.info("Keyed %d products", keyed)
+    if duplicates:
+        logger.warning(
+            "%d products duplicate the name of another product in their catalog "
+            "and were left without a dedup key",
+            duplicates,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # The column is dropped by 28d047386b23, keys left in place are harmless
+    pass
@@ -1,2 +1,3 @@
+from .changes import ChangeLog
 from .products import Product
 from .catalogs import Catalog
@@ -1,13 +1,18 @@
+import asyncio
 from datetime import datetime
-from typing import Sequence
+from typing import Callable, Sequence
 
-from sqlalchemy import insert, func
+from sqlalchemy import insert, func, delete, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import aliased
 from sqlmodel import Field, SQLModel, DateTime, select
 
-from models import Product
+from models import ChangeLog, Product
+from models.columnar import ColumnBatch, insert_columns, is_columnar
 from schemas.catalogs import CatalogWIthProductCount
+from services.config import settings
+from services.counting import count_service
+from shared.dedup import dedup_key, normalize_name
 
 
 class Catalog(SQLModel, table=True):
@@ -18,6 +23,8 @@ class Catalog(SQLModel, table=True):
         sa_column_kwargs={"nullable": False},
         sa_type=DateTime,
     )
+    # Set by a soft delete, such catalogs are hidden from the API
+    deleted_at: datetime | None = Field(default=None, sa_type=DateTime)
 
     @classmethod
     async def all(
@@ -28,6 +35,7 @@ class Catalog(SQLModel, table=True):
         statement = (
             select(cls, func.count(product_alias.product_id).label("products_count"))
             .outerjoin(product_alias, product_alias.catalog_id == cls.catalog_id)
+            .where(cls.deleted_at.is_(None))
             .group_by(cls.catalog_id)
             .order_by(cls.created_at.desc())
             .limit(limit)
@@ -42,33 +50,187 @@ class Catalog(SQLModel, table=True):
         ]
 
     @classmethod
-    async def get_by_id(cls, db: AsyncSession, catalog_id: int) -> "Catalog | None":
-        return await db.get(cls, catalog_id)
+    async def get_by_id(
+        cls, db: AsyncSession, catalog_id: int, include_deleted: bool = False
+    ) -> "Catalog | None":
+        catalog = await db.get(cls, catalog_id)
+        if catalog and catalog.deleted_at and not include_deleted:
+            return None
+        return catalog
+
+    @classmethod
+    async def ids(cls, db: AsyncSession) -> set[int]:
+        """Ids of the catalogs visible through the API."""
+        result = await db.scalars(
+            select(cls.catalog_id).where(cls.deleted_at.is_(None))
+        )
+        return set(result.all())
+
+    @classmethod
+    async def count_products(cls, db: AsyncSession, catalog_id: int) -> int:
+        statement = (
+            select(func.count())
+            .select_from(Product)
+            .where(Product.catalog_id == catalog_id)
+        )
+        return await db.scalar(statement)
+
+    @classmethod
+    async def reassign_conflicts(
+        cls,
+        db: AsyncSession,
+        catalog_id: int,
+        reassign_to: int,
+        batch_size: int | None = None,
+    ) -> list[str]:
+        """
+        Names of the products of `catalog_id` that `reassign_to` already has,
+        which the unique `dedup_key` index would reject when they are moved.
+        """
+        batch_size = batch_size or settings.CATALOG_DELETE_BATCH_SIZE
+        conflicts = []
+        last_id = 0
+        while True:
+            rows = (
+                await db.execute(
+                    select(Product.product_id, Product.name)
+                    .where(
+                        Product.catalog_id == catalog_id,
+                        Product.product_id > last_id,
+                    )
+                    .order_by(Product.product_id)
+                    .limit(batch_size)
+                )
+            ).all()
+            if not rows:
+                return conflicts
+            last_id = rows[-1].product_id
+            keys = {dedup_key(normalize_name(name), reassign_to) for _, name in rows}
+            existing = await db.scalars(
+                select(Product.name).where(
+                    Product.catalog_id == reassign_to, Product.dedup_key.in_(keys)
+                )
+            )
+            conflicts.extend(existing.all())
 
     @classmethod
     async def create(cls, db, name: str):
         instance = cls(name=name)
         db.add(instance)
+        await db.flush()
+        ChangeLog.record(db, cls.__tablename__, "create", instance.catalog_id)
         await db.commit()
+        count_service.invalidate(cls.__tablename__)
         await db.refresh(instance)
         return instance
 
     @classmethod
     async def bulk_create(
-        cls, db, catalogs: Sequence["Catalog"]
-    ) -> Sequence["Catalog"]:
+        cls, db, catalogs: Sequence["Catalog"] | ColumnBatch
+    ) -> Sequence["Catalog"] | int:
+        """
+        Inserts Catalog instances and returns them, or a columnar batch (column
+        lists, DataFrame or Arrow table) bound to the insert directly without
+        building a model per row, returning the number of inserted rows.
+        """
+        if is_columnar(catalogs):
+            inserted = await insert_columns(db, cls, catalogs)
+            ChangeLog.record(db, cls.__tablename__, "bulk_create", count=inserted)
+            await db.commit()
+            count_service.invalidate(cls.__tablename__)
+            return inserted
+
         values = [c.model_dump(exclude_unset=True) for c in catalogs]
         stmt = insert(Catalog).values(values).returning(Catalog)
         result = await db.execute(stmt)
+        created = result.scalars().all()
+        ChangeLog.record(
+            db,
+            cls.__tablename__,
+            "bulk_create",
+            count=len(created),
+            catalog_ids=[c.catalog_id for c in created],
+        )
         await db.commit()
-        return result.scalars().all()
+        count_service.invalidate(cls.__tablename__)
+        return created
 
     async def update(self, db, name: str):
         self.name = name
+        ChangeLog.record(db, self.__tablename__, "update", self.catalog_id)
         await db.commit()
         await db.refresh(self)
         return self
 
-    async def delete(self, db):
+    async def soft_delete(self, db):
+        if self.deleted_at is None:
+            self.deleted_at = datetime.now()
+            ChangeLog.record(db, self.__tablename__, "soft_delete", self.catalog_id)
+            await db.commit()
+            count_service.invalidate(self.__tablename__)
+        return self
+
+    async def delete(
+        self,
+        db,
+        reassign_to: int | None = None,
+        batch_size: int | None = None,
+        on_progress: Callable[[int], None] | None = None,
+    ):
+        """
+        Deletes the catalog after deleting its products, or moving them to
+        `reassign_to`, in batches of `batch_size`. Every batch is its own short
+        transaction so the product table is never locked for the whole run.
+        """
+        batch_size = batch_size or settings.CATALOG_DELETE_BATCH_SIZE
+        while True:
+            rows = (
+                await db.execute(
+                    select(Product.product_id, Product.name)
+                    .where(Product.catalog_id == self.catalog_id)
+                    .limit(batch_size)
+                )
+            ).all()
+            if not rows:
+                break
+            product_ids = [product_id for product_id, _ in rows]
+
+            if reassign_to is None:
+                ChangeLog.record(
+                    db, Product.__tablename__, "bulk_delete", product_ids=product_ids
+                )
+                await db.execute(
+                    delete(Product).where(Product.product_id.in_(product_ids)),
+                    execution_options={"synchronize_session": False},
+                )
+            else:
+                ChangeLog.record(
+                    db,
+                    Product.__tablename__,
+                    "bulk_update",
+                    product_ids=product_ids,
+                    catalog_id=reassign_to,
+                )
+                # The key includes the catalog, one UPDATE per row by primary key
+                await db.execute(
+                    update(Product),
+                    [
+                        {
+                            "product_id": product_id,
+                            "catalog_id": reassign_to,
+                            "dedup_key": dedup_key(normalize_name(name), reassign_to),
+                        }
+                        for product_id, name in rows
+                    ],
+                )
+            await db.commit()
+            count_service.invalidate(Product.__tablename__)
+            if on_progress:
+                on_progress(len(product_ids))
+            # Let other requests run between batches
+            await asyncio.sleep(0)
+
+        ChangeLog.record(db, self.__tablename__, "delete", self.catalog_id)
         await db.delete(self)
         await db.commit()
+        count_service.invalidate(self.__tablename__)
@@ -0,0 +1,135 @@
+import json
+from datetime import datetime
+from itertools import count
+from typing import Any, Sequence
+
+from sqlalchemy import delete, event, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlmodel import Field, SQLModel, DateTime, select
+
+from services.changes import change_bus
+from services.config import settings
+from services.shared_cache import shared_versions
+
+# Advisory lock serializing changelog inserts on PostgreSQL, see `_insert_changes`
+CHANGELOG_LOCK = 0x6368616E67656C6F
+# Commits with changes between two prunes of the changelog, per process
+PRUNE_EVERY = 100
+_commits = count()
+
+
+class ChangeLog(SQLModel, table=True):
+    """
+    One row per committed mutation of products or catalogs. Bulk operations
+    are recorded as a single row with the details in `detail`.
+    """
+
+    seq: int | None = Field(default=None, primary_key=True)
+    entity: str
+    op: str
+    entity_id: int | None = None
+    detail: str | None = None
+    created_at: datetime = Field(
+        default_factory=datetime.now,
+        sa_column_kwargs={"nullable": False},
+        sa_type=DateTime,
+    )
+
+    @classmethod
+    def record(
+        cls,
+        db: AsyncSession,
+        entity: str,
+        op: str,
+        entity_id: int | None = None,
+        **detail,
+    ) -> "ChangeLog":
+        """
+        Adds the entry to the current transaction. It is inserted, and gets
+        its seq, when the transaction commits and is published after that.
+        """
+        entry = cls(
+            entity=entity,
+            op=op,
+            entity_id=entity_id,
+            detail=json.dumps(detail, default=str) if detail else None,
+        )
+        db.info.setdefault("pending_changes", []).append(entry)
+        return entry
+
+    @classmethod
+    async def since(
+        cls, db: AsyncSession, seq: int, limit: int = 500
+    ) -> Sequence["ChangeLog"]:
+        statement = select(cls).where(cls.seq > seq).order_by(cls.seq).limit(limit)
+        result = await db.execute(statement)
+        return result.scalars().all()
+
+    @classmethod
+    async def last_seq(cls, db: AsyncSession) -> int:
+        return await db.scalar(select(func.coalesce(func.max(cls.seq), 0)))
+
+    @classmethod
+    async def is_pruned(cls, db: AsyncSession, seq: int) -> bool:
+        """Whether entries following `seq` were removed by the retention."""
+        first = await db.scalar(select(func.min(cls.seq)))
+        return first is not None and seq + 1 < first
+
+    def as_event(self) -> dict[str, Any]:
+        return {
+            "seq": self.seq,
+            "entity": self.entity,
+            "op": self.op,
+            "entity_id": self.entity_id,
+            "detail": json.loads(self.detail) if self.detail else None,
+            "created_at": self.created_at.isoformat(),
+        }
+
+
+@event.listens_for(Session, "before_commit")
+def _insert_changes(session: Session):
+    entries = session.info.pop("pending_changes", None)
+    if not entries:
+        return
+    if session.connection().dialect.name == "postgresql":
+        # Held until commit: the next transaction takes its seq after this
+        # one is visible, so readers never skip a seq committed later. SQLite
+        # serializes writing transactions already.
+        session.execute(select(func.pg_advisory_xact_lock(CHANGELOG_LOCK)))
+    if settings.CHANGES_RETENTION and next(_commits) % PRUNE_EVERY == 0:
+        newest = select(func.max(ChangeLog.seq)).scalar_subquery()
+        session.execute(
+            delete(ChangeLog).where(
+                ChangeLog.seq <= newest - settings.CHANGES_RETENTION
+            ),
+            execution_options={"synchronize_session": False},
+        )
+    # Flushed by the commit, right after this hook
+    session.add_all(entries)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session: Session, flush_context):
+    # seq is assigned by now, but the entries are still listed as new
+    for instance in session.new:
+        if isinstance(instance, ChangeLog):
+            session.info.setdefault("changes", []).append(instance.as_event())
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_changes(session: Session):
+    changes = session.info.pop("changes", [])
+    for change in changes:
+        change_bus.publish(change)
+    if changes:
+        # Tells caches and change feeds of the other workers
+        for entity in {change["entity"] for change in changes}:
+            shared_versions.bump(entity)
+        shared_versions.bump(ChangeLog.__tablename__)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session: Session):
+    session.info.pop("pending_changes", None)
+    session.info.pop("changes", None)
@@ -0,0 +1,106 @@
+from itertools import repeat
+from typing import Any, Iterator, Mapping, Sequence
+
+from pydantic_core import PydanticUndefined
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import SQLModel
+
+# A batch of rows stored by column: a mapping of column name to values, a
+# pandas DataFrame or a pyarrow Table
+ColumnBatch = Mapping[str, Sequence[Any]] | Any
+
+
+def is_columnar(batch) -> bool:
+    return (
+        isinstance(batch, Mapping)
+        or hasattr(batch, "to_pydict")
+        or (hasattr(batch, "columns") and hasattr(batch, "to_dict"))
+    )
+
+
+def as_columns(batch: ColumnBatch) -> dict[str, Sequence[Any]]:
+    """Returns plain Python column lists without importing pandas or pyarrow."""
+    if hasattr(batch, "to_pydict"):  # pyarrow.Table / RecordBatch
+        return batch.to_pydict()
+    if hasattr(batch, "columns") and hasattr(batch, "to_dict"):  # pandas.DataFrame
+        # tolist() turns numpy scalars into Python ones the drivers accept
+        return {column: batch[column].tolist() for column in batch.columns}
+    return dict(batch)
+
+
+def batch_length(batch: ColumnBatch) -> int:
+    columns = as_columns(batch) if not isinstance(batch, Mapping) else batch
+    lengths = {len(values) for values in columns.values()}
+    if len(lengths) > 1:
+        raise ValueError("All columns of a batch must have the same length")
+    return lengths.pop() if lengths else 0
+
+
+def row_chunks(
+    model: type[SQLModel], batch: ColumnBatch, chunk_size: int = 10_000
+) -> Iterator[list[dict[str, Any]]]:
+    """
+    Yields insert parameters for `chunk_size` rows at a time. Fields missing
+    from the batch get the model default, computed once for the whole batch,
+    so no model instance is built per row.
+    """
+    columns = as_columns(batch)
+    unknown = columns.keys() - model.__table__.columns.keys()
+    if unknown:
+        raise ValueError(f"Unknown columns for {model.__name__}: {sorted(unknown)}")
+    length = batch_length(columns)
+
+    defaults = {}
+    for name, field in model.model_fields.items():
+        if name in columns:
+            continue
+        if field.default_factory is not None:
+            defaults[name] = field.default_factory()
+        elif field.default is not PydanticUndefined and field.default is not None:
+            defaults[name] = field.default
+
+    names = [*columns, *defaults]
+    for start in range(0, length, chunk_size):
+        values = [column[start : start + chunk_size] for column in columns.values()]
+        constants = [repeat(default) for default in defaults.values()]
+        yield [dict(zip(names, row)) for row in zip(*values, *constants)]
+
+
+def _insert_skipping(db: AsyncSession, table, index_elements: Sequence[str]):
+    """INSERT .. ON CONFLICT (index_elements) DO NOTHING for the session's dialect."""
+    dialect = db.bind.dialect.name
+    if dialect == "postgresql":
+        statement = postgresql.insert(table)
+    elif dialect == "sqlite":
+        statement = sqlite.insert(table)
+    else:
+        raise ValueError(f"Skipping conflicting rows is not supported on {dialect}")
+    statement = statement.on_conflict_do_nothing(index_elements=index_elements)
+    # Only rows actually inserted are returned, which counts the skipped ones
+    return statement.returning(*table.primary_key.columns)
+
+
+async def insert_columns(
+    db: AsyncSession,
+    model: type[SQLModel],
+    batch: ColumnBatch,
+    chunk_size: int = 10_000,
+    skip_conflicts: Sequence[str] = (),
+) -> int:
+    """
+    Executes a multi-row insert per chunk, the caller commits. Rows violating
+    the unique index on `skip_conflicts` are skipped instead of failing the
+    load; the returned count only includes inserted rows.
+    """
+    table = model.__table__
+    inserted = 0
+    for rows in row_chunks(model, batch, chunk_size):
+        if skip_conflicts:
+            result = await db.execute(_insert_skipping(db, table, skip_conflicts), rows)
+            inserted += len(result.all())
+        else:
+            await db.execute(insert(table), rows)
+            inserted += len(rows)
+    return inserted
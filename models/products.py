@@ -1,10 +1,15 @@
 from datetime import datetime
 from typing import Sequence
 
-from sqlalchemy import insert, func
+from sqlalchemy import BigInteger, insert, func, inspect
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import Field, SQLModel, DateTime, select
 
+from models.changes import ChangeLog
+from models.columnar import ColumnBatch, insert_columns, is_columnar
+from services.counting import count_service
+from shared.dedup import dedup_key, normalize_name
+
 
 class Product(SQLModel, table=True):
     product_id: int | None = Field(default=None, primary_key=True)
@@ -21,7 +26,13 @@ class Product(SQLModel, table=True):
         sa_type=DateTime,
     )
 
-    catalog_id: int = Field(foreign_key="catalog.catalog_id")
+    catalog_id: int = Field(foreign_key="catalog.catalog_id", index=True)
+    # Hash of the normalized name and catalog_id. The unique index rejects a
+    # second product with the same name in a catalog, e.g. loaded again by a
+    # later ETL file.
+    dedup_key: int | None = Field(
+        default=None, sa_type=BigInteger, unique=True, index=True, exclude=True
+    )
 
     # @classmethod
     # async def save(cls, db: AsyncSession, instance: "Product") -> "Product":
@@ -42,22 +53,61 @@ class Product(SQLModel, table=True):
 
     @classmethod
     async def create(cls, db: AsyncSession, name: str, price: float, catalog_id: int):
-        instance = cls(name=name, price=price, catalog_id=catalog_id)
+        instance = cls(
+            name=name,
+            price=price,
+            catalog_id=catalog_id,
+            dedup_key=dedup_key(normalize_name(name), catalog_id),
+        )
         db.add(instance)
+        await db.flush()
+        ChangeLog.record(db, cls.__tablename__, "create", instance.product_id)
         await db.commit()
+        count_service.invalidate(cls.__tablename__)
         await db.refresh(instance)
         return instance
 
     @classmethod
     async def bulk_create(
-        cls, db, products: Sequence["Product"]
-    ) -> Sequence["Product"]:
+        cls,
+        db,
+        products: Sequence["Product"] | ColumnBatch,
+        skip_duplicates: bool = False,
+    ) -> Sequence["Product"] | int:
+        """
+        Inserts Product instances and returns them, or a columnar batch (column
+        lists, DataFrame or Arrow table) bound to the insert directly without
+        building a model per row, returning the number of inserted rows.
+        With `skip_duplicates`, rows of a columnar batch whose `dedup_key` is
+        already stored are skipped and not counted.
+        """
+        if is_columnar(products):
+            inserted = await insert_columns(
+                db,
+                cls,
+                products,
+                skip_conflicts=["dedup_key"] if skip_duplicates else (),
+            )
+            ChangeLog.record(db, cls.__tablename__, "bulk_create", count=inserted)
+            await db.commit()
+            count_service.invalidate(cls.__tablename__)
+            return inserted
+
         values = [p.model_dump(exclude_unset=True) for p in products]
 
         stmt = insert(Product).values(values).returning(Product)
         result = await db.execute(stmt)
+        created = result.scalars().all()
+        ChangeLog.record(
+            db,
+            cls.__tablename__,
+            "bulk_create",
+            count=len(created),
+            product_ids=[p.product_id for p in created],
+        )
         await db.commit()
-        return result.scalars().all()
+        count_service.invalidate(cls.__tablename__)
+        return created
 
     async def update(self, db: AsyncSession, **kwargs):
         for attr, value in kwargs.items():
@@ -66,13 +116,24 @@ class Product(SQLModel, table=True):
                 value
             ):
                 setattr(self, attr, value)
+        state = inspect(self)
+        if any(
+            state.attrs[attr].history.has_changes() for attr in ("name", "catalog_id")
+        ):
+            # May now collide with another product, the unique index refuses it
+            self.dedup_key = dedup_key(normalize_name(self.name), self.catalog_id)
+        ChangeLog.record(db, self.__tablename__, "update", self.product_id)
         await db.commit()
+        # catalog_id may have changed, which moves the product between filters
+        count_service.invalidate(self.__tablename__)
         await db.refresh(self)
         return self
 
     async def delete(self, db: AsyncSession):
+        ChangeLog.record(db, self.__tablename__, "delete", self.product_id)
         await db.delete(self)
         await db.commit()
+        count_service.invalidate(self.__tablename__)
 
     @classmethod
     async def get_by_id(cls, db: AsyncSession, product_id: int) -> "Product | None":
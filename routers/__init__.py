@@ -1,2 +1,5 @@
 from .products import products_router
 from .catalogs import catalogs_router
+from .system import system_router
+from .changes import changes_router
+from .etl import etl_router
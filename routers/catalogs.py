@@ -1,17 +1,27 @@
 from shutil import copyfileobj
+from typing import Literal
 
 from fastapi import APIRouter, HTTPException, File, UploadFile
 
+from fastapi.encoders import jsonable_encoder
 from fastapi.params import Depends, File, Query
+from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from models import Catalog
+from models.columnar import batch_length
 from schemas import ErrorResponse
 from schemas.catalogs import CatalogCreate, CatalogWIthProductCount
-from services.engine import get_session
+from schemas.jobs import Job
+from services.admission import admitted
+from services.coalescing import single_flight
+from services.counting import count_service
+from services.engine import get_session, get_session_factory
+from services.jobs import jobs
 from services.pagination import PaginatedResponse
-from shared.exeptions import CatalogNotFound
-from shared.utils import load_catalogs
+from services.reload import FullReload, ReloadError
+from services.shared_cache import shared_cache
+from shared.exeptions import CatalogNotFound, ReassignConflict
 
 catalogs_router = APIRouter(tags=["Catalogs"], prefix="/api/v1")
 
@@ -24,11 +34,28 @@ catalogs_router = APIRouter(tags=["Catalogs"], prefix="/api/v1")
 async def get_catalogs(
     limit: int = Query(100, ge=0),
     offset: int = Query(0, ge=0),
+    exact: bool = Query(True, description="Allow an estimated total when false"),
     session: AsyncSession = Depends(get_session),
 ):
-    async with session as db:
-        catalogs = await Catalog.all(db, limit=limit, offset=offset)
-    return PaginatedResponse(count=len(catalogs), items=catalogs)  # type: ignore
+    async def fetch():
+        async with admitted(), session as db:
+            catalogs = await Catalog.all(db, limit=limit, offset=offset)
+            total, estimated = await count_service.total(
+                db, Catalog, exact=exact, deleted_at=None
+            )
+        return PaginatedResponse(
+            count=len(catalogs),
+            total=total,
+            estimated=estimated,
+            items=catalogs,  # type: ignore
+        )
+
+    key = ("catalogs", limit, offset, exact)
+    # Shared by all workers until a catalog or product changes, concurrent
+    # identical misses share a single query
+    return await shared_cache.fetch(
+        ("catalog", "product"), key, lambda: single_flight.do(key, fetch)
+    )
 
 
 @catalogs_router.get(
@@ -38,10 +65,13 @@ async def get_catalogs(
     summary="Get catalog by ID",
 )
 async def get_catalog(catalog_id: int, session: AsyncSession = Depends(get_session)):
-    async with session as db:
-        catalog = await Catalog.get_by_id(db, catalog_id)
-        if not catalog:
-            raise CatalogNotFound()
+    async def fetch():
+        async with session as db:
+            return await Catalog.get_by_id(db, catalog_id)
+
+    catalog = await shared_cache.fetch(("catalog",), ("catalog", catalog_id), fetch)
+    if not catalog:
+        raise CatalogNotFound()
     return catalog
 
 
@@ -80,16 +110,71 @@ async def update_catalog(
 @catalogs_router.delete(
     "/catalogs/{catalog_id}",
     response_model=Catalog | None,
-    responses={404: {"model": ErrorResponse}},
+    responses={
+        202: {"model": Job, "description": "Deletion continues in a background job"},
+        400: {"model": ErrorResponse},
+        404: {"model": ErrorResponse},
+        409: {"model": ErrorResponse},
+    },
     summary="Delete a catalog",
 )
-async def delete_catalog(catalog_id: int, session: AsyncSession = Depends(get_session)):
+async def delete_catalog(
+    catalog_id: int,
+    reassign_to: int | None = Query(
+        None, description="Move the products to this catalog instead of deleting them"
+    ),
+    soft: bool = Query(False, description="Only hide the catalog and keep its data"),
+    background: bool = Query(
+        False, description="Hide the catalog now and remove its products in a job"
+    ),
+    session: AsyncSession = Depends(get_session),
+    session_factory=Depends(get_session_factory),
+):
     async with session as db:
-        catalog = await Catalog.get_by_id(db, catalog_id)
+        # A soft-deleted catalog can still be purged
+        catalog = await Catalog.get_by_id(db, catalog_id, include_deleted=not soft)
         if not catalog:
             raise CatalogNotFound()
-        await catalog.delete(db)
-        return catalog
+        if reassign_to is not None:
+            if reassign_to == catalog_id:
+                raise HTTPException(
+                    status_code=400,
+                    detail="Cannot reassign products to the same catalog",
+                )
+            if not await Catalog.get_by_id(db, reassign_to):
+                raise CatalogNotFound()
+            # Checked before hiding anything, moving them would break off
+            # halfway on the unique dedup_key index
+            conflicts = await Catalog.reassign_conflicts(db, catalog_id, reassign_to)
+            if conflicts:
+                raise ReassignConflict(conflicts)
+
+        # Hidden right away in every mode, readers stop seeing the catalog
+        # while its products go in batches
+        await catalog.soft_delete(db)
+        if soft:
+            return catalog
+        if not background:
+            await catalog.delete(db, reassign_to=reassign_to)
+            return catalog
+
+        total = await Catalog.count_products(db, catalog_id)
+
+    async def purge(job: Job):
+        def on_progress(processed: int):
+            jobs.progress(job, processed)
+
+        async with session_factory() as job_db:
+            to_delete = await Catalog.get_by_id(
+                job_db, catalog_id, include_deleted=True
+            )
+            if to_delete:
+                await to_delete.delete(
+                    job_db, reassign_to=reassign_to, on_progress=on_progress
+                )
+
+    job = jobs.spawn("delete_catalog", purge, total=total)
+    return JSONResponse(status_code=202, content=jsonable_encoder(job))
 
 
 # ETL Routers
@@ -97,20 +182,49 @@ async def delete_catalog(catalog_id: int, session: AsyncSession = Depends(get_se
 
 @catalogs_router.post("/etl/catalogs", summary="ETL Catalogs")
 async def etl_catalogs(
-    file: UploadFile = File(...), session: AsyncSession = Depends(get_session)
+    file: UploadFile = File(...),
+    mode: Literal["append", "full"] = Query(
+        "append",
+        description="`full` replaces all catalogs through a staging table swap",
+    ),
+    session: AsyncSession = Depends(get_session),
 ):
     if not file.content_type == "text/csv":
         raise HTTPException(
             status_code=400, detail="Invalid file type. Only CSV files are allowed."
         )
+    # pandas and loguru are only needed here, keep them out of worker startup
+    from shared.utils import load_catalogs
+
     async with session as db:
         try:
-            catalogs = load_catalogs(file.file)
-            if not catalogs:
+            catalogs, report = load_catalogs(file.file, with_ids=mode == "full")
+            if not batch_length(catalogs):
                 raise HTTPException(
                     status_code=400, detail="No valid catalogs found in the file."
                 )
+            if mode == "full":
+                quality = await FullReload(Catalog).run(db, catalogs)
+                return {
+                    "message": "Full reload completed successfully",
+                    "report": report,
+                    "quality": quality,
+                }
             await Catalog.bulk_create(db, catalogs)
         except ValueError as e:
             raise HTTPException(status_code=400, detail=str(e))
-        return {"message": "ETL process completed successfully"}
+        return {"message": "ETL process completed successfully", "report": report}
+
+
+@catalogs_router.post(
+    "/etl/catalogs/rollback",
+    responses={400: {"model": ErrorResponse}},
+    summary="Restore catalogs replaced by the last full reload",
+)
+async def rollback_catalogs(session: AsyncSession = Depends(get_session)):
+    async with session as db:
+        try:
+            await FullReload(Catalog).rollback(db)
+        except ReloadError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    return {"message": "Rollback completed successfully"}
@@ -0,0 +1,123 @@
+import asyncio
+import json
+from time import monotonic
+from typing import AsyncIterator
+
+from fastapi import APIRouter, Header
+from fastapi.params import Depends, Query
+from fastapi.responses import StreamingResponse
+
+from models import ChangeLog
+from services.changes import RESYNC, change_bus
+from services.engine import get_session_factory
+from services.shared_cache import shared_versions
+
+changes_router = APIRouter(tags=["Changes"], prefix="/api/v1")
+
+CATCH_UP_BATCH = 500
+KEEPALIVE_SECONDS = 15
+# With several workers, commits of the others only show up in the shared
+# changelog version, which is checked this often
+CROSS_WORKER_POLL_SECONDS = 0.5
+
+
+def format_event(change: dict) -> str:
+    return f"id: {change['seq']}\nevent: change\ndata: {json.dumps(change)}\n\n"
+
+
+def format_resync(seq: int, pruned: bool = False) -> str:
+    data = {"seq": seq, "pruned": pruned}
+    return f"event: resync\ndata: {json.dumps(data)}\n\n"
+
+
+async def change_stream(
+    since: int, follow: bool, session_factory
+) -> AsyncIterator[str]:
+    # Subscribe before catching up so nothing committed in between is missed,
+    # duplicates are skipped by seq
+    subscriber = change_bus.subscribe() if follow else None
+    last_seq = since
+    try:
+        while True:
+            # Read before catching up, so a commit made meanwhile by another
+            # worker is noticed below
+            version = shared_versions.get(ChangeLog.__tablename__)
+            async with session_factory() as db:
+                pruned = await ChangeLog.is_pruned(db, last_seq)
+                if pruned:
+                    last_seq = await ChangeLog.last_seq(db)
+            if pruned:
+                # The missed entries are gone, the client has to reload its
+                # state and continues from the current position
+                yield format_resync(last_seq, pruned=True)
+            # Catch up from the changelog, one short session per batch so the
+            # stream never holds a pool connection while idle
+            while True:
+                async with session_factory() as db:
+                    entries = await ChangeLog.since(db, last_seq, limit=CATCH_UP_BATCH)
+                for entry in entries:
+                    yield format_event(entry.as_event())
+                    last_seq = entry.seq
+                if len(entries) < CATCH_UP_BATCH:
+                    break
+            if not follow:
+                return
+
+            wait = (
+                CROSS_WORKER_POLL_SECONDS
+                if shared_versions.shared
+                else KEEPALIVE_SECONDS
+            )
+            last_sent = monotonic()
+            while True:
+                try:
+                    change = await asyncio.wait_for(subscriber.get(), wait)
+                except asyncio.TimeoutError:
+                    if shared_versions.get(ChangeLog.__tablename__) != version:
+                        # Another worker committed, read it from the changelog
+                        break
+                    if monotonic() - last_sent >= KEEPALIVE_SECONDS:
+                        yield ": keepalive\n\n"
+                        last_sent = monotonic()
+                    continue
+                if change is RESYNC:
+                    # Too slow to keep up, events were dropped
+                    yield format_resync(last_seq)
+                    break
+                if change["seq"] > last_seq:
+                    yield format_event(change)
+                    last_seq = change["seq"]
+                    last_sent = monotonic()
+    finally:
+        if subscriber:
+            change_bus.unsubscribe(subscriber)
+
+
+@changes_router.get(
+    "/changes",
+    response_class=StreamingResponse,
+    summary="Stream product and catalog changes (Server-Sent Events)",
+)
+async def get_changes(
+    since: int | None = Query(
+        None, description="Resume after this sequence number, 0 replays everything"
+    ),
+    follow: bool = Query(True, description="Keep streaming new changes"),
+    last_event_id: int | None = Header(None),
+    session_factory=Depends(get_session_factory),
+):
+    """
+    Each event carries the changelog sequence number as its id, so clients
+    reconnecting with `Last-Event-ID` resume where they stopped. Without
+    either, only changes from now on are streamed.
+    """
+    if since is None:
+        since = last_event_id
+    if since is None:
+        async with session_factory() as db:
+            since = await ChangeLog.last_seq(db)
+    return StreamingResponse(
+        change_stream(since, follow, session_factory),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
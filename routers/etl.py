@@ -0,0 +1,23 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse
+
+from schemas import ErrorResponse
+from shared.quality import rejects_path
+
+etl_router = APIRouter(tags=["ETL"], prefix="/api/v1/etl")
+
+
+@etl_router.get(
+    "/rejects/{report_id}",
+    response_class=FileResponse,
+    responses={404: {"model": ErrorResponse}},
+    summary="Download the rejected rows of an ETL load",
+)
+async def get_rejects(report_id: str):
+    """CSV with the rejected input rows and the reason of each rejection."""
+    path = rejects_path(report_id)
+    if not path:
+        raise HTTPException(status_code=404, detail="Rejected rows not found")
+    return FileResponse(
+        path, media_type="text/csv", filename=f"rejects-{report_id}.csv"
+    )
@@ -1,16 +1,22 @@
+from typing import Literal
+
 from fastapi import APIRouter, UploadFile, File, HTTPException
 from fastapi.params import Depends, Query
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlmodel import select
 
 from models import Catalog
 from models.products import Product
 from schemas import ErrorResponse
 from schemas.products import ProductCreate, ProductUpdate
+from services.admission import admitted
+from services.coalescing import single_flight
+from services.counting import count_service
 from services.engine import get_session
 from services.pagination import PaginatedResponse
-from shared.exeptions import ProductNotFound, CatalogNotFound
-from shared.utils import load_products
+from services.reload import FullReload, ReloadError
+from services.shared_cache import shared_cache
+from shared.exeptions import ProductAlreadyExists, ProductNotFound, CatalogNotFound
 
 products_router = APIRouter(tags=["Products"], prefix="/api/v1")
 
@@ -23,32 +29,42 @@ products_router = APIRouter(tags=["Products"], prefix="/api/v1")
 async def get_products(
     limit: int = Query(100, ge=0),
     offset: int = Query(0, ge=0),
+    exact: bool = Query(True, description="Allow an estimated total when false"),
     session: AsyncSession = Depends(get_session),
 ):
     async with session as db:
         products = await Product.all(db, limit=limit, offset=offset)
-    return PaginatedResponse(count=len(products), items=products)  # type: ignore
+        total, estimated = await count_service.total(db, Product, exact=exact)
+    return PaginatedResponse(
+        count=len(products),
+        total=total,
+        estimated=estimated,
+        items=products,  # type: ignore
+    )
 
 
 @products_router.post(
     "/products",
     response_model=Product,
-    responses={404: {"model": ErrorResponse}},
+    responses={404: {"model": ErrorResponse}, 409: {"model": ErrorResponse}},
     summary="Create a new product",
 )
 async def create_product(
     product: ProductCreate, session: AsyncSession = Depends(get_session)
 ):
     async with session as db:
-        catalog = await db.execute(
-            select(Catalog).where(Catalog.catalog_id == product.catalog_id)
-        )
-        catalog = catalog.scalars().first()
+        catalog = await Catalog.get_by_id(db, product.catalog_id)
         if not catalog:
             raise CatalogNotFound()
-        product = await Product.create(
-            db, name=product.name, price=product.price, catalog_id=catalog.catalog_id
-        )
+        try:
+            product = await Product.create(
+                db,
+                name=product.name,
+                price=product.price,
+                catalog_id=catalog.catalog_id,
+            )
+        except IntegrityError:
+            raise ProductAlreadyExists()
         return product
 
 
@@ -73,12 +89,28 @@ async def get_products_by_catalog(
 async def get_top_products(
     top_n: int = Query(gt=0),
     offset: int = Query(0, ge=0),
+    exact: bool = Query(True, description="Allow an estimated total when false"),
     session: AsyncSession = Depends(get_session),
 ):
     """Get top N products by price."""
-    async with session as db:
-        products = await Product.get_top_products(db, top_n, offset=offset)
-    return PaginatedResponse(count=len(products), items=products)  # type: ignore
+
+    async def fetch():
+        async with admitted(), session as db:
+            products = await Product.get_top_products(db, top_n, offset=offset)
+            total, estimated = await count_service.total(db, Product, exact=exact)
+        return PaginatedResponse(
+            count=len(products),
+            total=total,
+            estimated=estimated,
+            items=products,  # type: ignore
+        )
+
+    key = ("top-products", top_n, offset, exact)
+    # Shared by all workers until a product changes, concurrent identical
+    # misses share a single query
+    return await shared_cache.fetch(
+        ("product",), key, lambda: single_flight.do(key, fetch)
+    )
 
 
 @products_router.get(
@@ -95,7 +127,7 @@ async def get_product(product_id: int, session: AsyncSession = Depends(get_sessi
 @products_router.patch(
     "/products/{product_id}",
     response_model=Product,
-    responses={404: {"model": ErrorResponse}},
+    responses={404: {"model": ErrorResponse}, 409: {"model": ErrorResponse}},
     summary="Update a product",
 )
 async def update_product(
@@ -108,15 +140,15 @@ async def update_product(
         if not existing_product:
             raise ProductNotFound()
         if product.catalog_id is not None:
-            catalog = await db.execute(
-                select(Catalog).where(Catalog.catalog_id == product.catalog_id)
-            )
-            catalog = catalog.scalars().first()
+            catalog = await Catalog.get_by_id(db, product.catalog_id)
             if not catalog:
                 raise CatalogNotFound()
-        updated_product = await existing_product.update(
-            db, **product.model_dump(exclude_unset=True)
-        )
+        try:
+            updated_product = await existing_product.update(
+                db, **product.model_dump(exclude_unset=True)
+            )
+        except IntegrityError:
+            raise ProductAlreadyExists()
         return updated_product
 
 
@@ -137,20 +169,59 @@ async def delete_product(product_id: int, session: AsyncSession = Depends(get_se
 
 @products_router.post("/etl/products", summary="ETL Products")
 async def etl_catalogs(
-    file: UploadFile = File(...), session: AsyncSession = Depends(get_session)
+    file: UploadFile = File(...),
+    mode: Literal["append", "full"] = Query(
+        "append",
+        description="`full` replaces all products through a staging table swap",
+    ),
+    session: AsyncSession = Depends(get_session),
 ):
     if not file.content_type == "text/csv":
         raise HTTPException(
             status_code=400, detail="Invalid file type. Only CSV files are allowed."
         )
+    # pandas and loguru are only needed here, keep them out of worker startup
+    from shared.utils import load_products
+
     async with session as db:
+
+        async def insert(chunk):
+            # Products loaded by an earlier file are skipped by the unique index
+            return await Product.bulk_create(db, chunk, skip_duplicates=True)
+
         try:
-            products = await load_products(file.file)
-            if not products:
+            products, report = await load_products(
+                file.file,
+                with_ids=mode == "full",
+                known_catalogs=await Catalog.ids(db),
+                # A full reload swaps the whole feed in at once
+                insert=insert if mode == "append" else None,
+            )
+            if not report.accepted:
                 raise HTTPException(
                     status_code=400, detail="No valid products found in the file."
                 )
-            await Product.bulk_create(db, products)
+            if mode == "full":
+                quality = await FullReload(Product).run(db, products)
+                return {
+                    "message": "Full reload completed successfully",
+                    "report": report,
+                    "quality": quality,
+                }
         except ValueError as e:
             raise HTTPException(status_code=400, detail=str(e))
-        return {"message": "ETL process completed successfully"}
+        return {"message": "ETL process completed successfully", "report": report}
+
+
+@products_router.post(
+    "/etl/products/rollback",
+    responses={400: {"model": ErrorResponse}},
+    summary="Restore products replaced by the last full reload",
+)
+async def rollback_products(session: AsyncSession = Depends(get_session)):
+    async with session as db:
+        try:
+            await FullReload(Product).rollback(db)
+        except ReloadError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    return {"message": "Rollback completed successfully"}
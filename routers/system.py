@@ -0,0 +1,76 @@
+import hmac
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import FileResponse
+
+from schemas import ErrorResponse
+from schemas.jobs import Job
+from schemas.system import AdmissionStats, ProfileSummary
+from services.admission import admission
+from services.config import settings
+from services.jobs import jobs
+from services.profiling import profile_store
+
+system_router = APIRouter(tags=["System"], prefix="/api/v1/system")
+
+
+@system_router.get(
+    "/admission",
+    response_model=AdmissionStats,
+    summary="Admission control stats of this worker",
+)
+async def get_admission_stats():
+    """
+    Queue depth and rejection counters of the request limiter of the worker
+    serving the request, identified by `worker` (its pid).
+    """
+    return admission.stats()
+
+
+@system_router.get(
+    "/jobs/{job_id}",
+    response_model=Job,
+    responses={404: {"model": ErrorResponse}},
+    summary="Get background job progress",
+)
+async def get_job(job_id: str):
+    job = jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+def require_profiling_token(x_profile_token: str | None = Header(None)):
+    if not settings.PROFILING_TOKEN:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    if not x_profile_token or not hmac.compare_digest(
+        x_profile_token, settings.PROFILING_TOKEN
+    ):
+        raise HTTPException(status_code=403, detail="Invalid profiling token")
+
+
+@system_router.get(
+    "/profiles",
+    response_model=list[ProfileSummary],
+    responses={403: {"model": ErrorResponse}, 404: {"model": ErrorResponse}},
+    dependencies=[Depends(require_profiling_token)],
+    summary="List stored request profiles",
+)
+async def get_profiles():
+    """Newest first, the store keeps the last `PROFILING_KEEP` profiles."""
+    return profile_store.list()
+
+
+@system_router.get(
+    "/profiles/{profile_id}",
+    response_class=FileResponse,
+    responses={403: {"model": ErrorResponse}, 404: {"model": ErrorResponse}},
+    dependencies=[Depends(require_profiling_token)],
+    summary="Download a request profile",
+)
+async def get_profile(profile_id: str):
+    """JSON with collapsed CPU stacks and the SQL timeline of the request."""
+    path = profile_store.path(profile_id)
+    if not path:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="application/json")
@@ -0,0 +1,22 @@
+from typing import Any
+
+from pydantic import BaseModel, Field
+
+
+class EtlReport(BaseModel):
+    report_id: str
+    entity: str
+    total_rows: int
+    accepted: int
+    rejected: int
+    reasons: dict[str, int] = Field(description="Rejected rows by reason")
+    duplicates: int = Field(
+        default=0,
+        description="Rows skipped because the same product was already in the feed "
+        "or in the database",
+    )
+    null_counts: dict[str, int] = Field(description="Missing values per input column")
+    samples: list[dict[str, Any]] = Field(description="First rejected rows")
+    rejects_url: str | None = Field(
+        default=None, description="Download of all rejected rows as CSV"
+    )
@@ -0,0 +1,14 @@
+from datetime import datetime
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+
+class Job(BaseModel):
+    job_id: str
+    kind: str
+    status: Literal["pending", "running", "completed", "failed"] = "pending"
+    processed: int = 0
+    total: int | None = None
+    error: str | None = None
+    created_at: datetime = Field(default_factory=datetime.now)
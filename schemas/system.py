@@ -0,0 +1,26 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class AdmissionStats(BaseModel):
+    # Each worker limits its own pool, the stats are those of the worker
+    # that answered
+    worker: int
+    capacity: int
+    in_flight: int
+    queue_depth: int
+    max_queue: int
+    admitted: int
+    rejected: dict[str, int]
+
+
+class ProfileSummary(BaseModel):
+    profile_id: str
+    method: str
+    path: str
+    status: int | None
+    started_at: datetime
+    duration: float | None
+    samples: int
+    queries: int
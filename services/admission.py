@@ -0,0 +1,196 @@
+import asyncio
+import os
+from collections import Counter
+from contextlib import asynccontextmanager, nullcontext
+from enum import IntEnum
+from heapq import heappop, heappush
+from itertools import count
+from math import ceil
+
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from services.config import settings
+from shared.exeptions import ServerBusy
+
+
+class Priority(IntEnum):
+    """Lower value is admitted first."""
+
+    READ = 0
+    WRITE = 1
+    ETL = 2
+
+
+def route_priority(method: str, path: str) -> Priority:
+    if path.startswith("/api/v1/etl"):
+        return Priority.ETL
+    if method in ("GET", "HEAD"):
+        return Priority.READ
+    return Priority.WRITE
+
+
+class AdmissionController:
+    """
+    Limits concurrent requests to the connection pool capacity. Requests over
+    the limit wait in a bounded priority queue; ETL requests may only hold
+    `etl_share` of the slots so they can't starve CRUD traffic.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        max_queue: int = 100,
+        queue_timeout: float = 2.0,
+        etl_share: float = 0.25,
+    ):
+        self.capacity = capacity
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.etl_limit = max(1, int(capacity * etl_share))
+
+        self.in_flight = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected: Counter[str] = Counter()
+        self._running: Counter[Priority] = Counter()
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._order = count()
+
+    def _can_run(self, priority: Priority) -> bool:
+        if self.in_flight >= self.capacity:
+            return False
+        return priority != Priority.ETL or self._running[Priority.ETL] < self.etl_limit
+
+    def _grant(self, priority: Priority):
+        self.in_flight += 1
+        self._running[priority] += 1
+        self.admitted += 1
+
+    def _drop_abandoned(self):
+        while self._waiters and self._waiters[0][2].done():
+            heappop(self._waiters)
+
+    async def acquire(self, priority: Priority) -> bool:
+        """Returns False if the request should be rejected."""
+        self._drop_abandoned()
+        ahead = self._waiters and self._waiters[0][0] <= priority
+        if not ahead and self._can_run(priority):
+            self._grant(priority)
+            return True
+
+        if self.queued >= self.max_queue:
+            self.rejected["queue_full"] += 1
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        heappush(self._waiters, (priority, next(self._order), waiter))
+        self.queued += 1
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+            return True
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as the timeout fired
+                return True
+            self.queued -= 1
+            self.rejected["timeout"] += 1
+            return False
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release(priority)
+            else:
+                waiter.cancel()
+                self.queued -= 1
+            raise
+
+    def release(self, priority: Priority):
+        self.in_flight -= 1
+        self._running[priority] -= 1
+        while self._waiters:
+            waiter_priority, _, waiter = self._waiters[0]
+            if waiter.done():
+                heappop(self._waiters)
+                continue
+            if not self._can_run(Priority(waiter_priority)):
+                break
+            heappop(self._waiters)
+            self.queued -= 1
+            self._grant(Priority(waiter_priority))
+            waiter.set_result(None)
+
+    @asynccontextmanager
+    async def slot(self, priority: Priority):
+        """Holds a slot for the block, raises ServerBusy if rejected."""
+        if not await self.acquire(priority):
+            raise ServerBusy(retry_after=max(1, ceil(self.queue_timeout)))
+        try:
+            yield
+        finally:
+            self.release(priority)
+
+    def stats(self) -> dict:
+        return {
+            "worker": os.getpid(),
+            "capacity": self.capacity,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queued,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+        }
+
+
+# Monitoring and long-lived streams don't hold a pool connection per request
+EXEMPT_PREFIXES = ("/api/v1/system", "/api/v1/changes")
+# Coalesced reads take their slot in `admitted` around the shared query, so
+# requests waiting for another request's result don't occupy one
+COALESCED_PATHS = ("/api/v1/catalogs", "/api/v1/products/top-products")
+
+
+class AdmissionMiddleware:
+    """Applies an AdmissionController to `/api/v1` routes, except EXEMPT_PREFIXES."""
+
+    def __init__(self, app: ASGIApp, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+        self.retry_after = str(max(1, ceil(controller.queue_timeout)))
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        path = scope.get("path", "")
+        if (
+            scope["type"] != "http"
+            or not path.startswith("/api/v1")
+            or path.startswith(EXEMPT_PREFIXES)
+            or (scope["method"] == "GET" and path in COALESCED_PATHS)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        priority = route_priority(scope["method"], path)
+        if not await self.controller.acquire(priority):
+            response = JSONResponse(
+                {"detail": "Server is busy, please retry later"},
+                status_code=503,
+                headers={"Retry-After": self.retry_after},
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(priority)
+
+
+admission = AdmissionController(
+    capacity=sum(settings.pool_limits),
+    max_queue=settings.ADMISSION_QUEUE_SIZE,
+    queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT,
+)
+
+
+def admitted(priority: Priority = Priority.READ):
+    """Admission for the query of a coalesced read, see COALESCED_PATHS."""
+    if not settings.ADMISSION_ENABLED:
+        return nullcontext()
+    return admission.slot(priority)
@@ -0,0 +1,54 @@
+import asyncio
+from typing import Any
+
+from services.config import settings
+
+# Returned by `Subscriber.get` after events were dropped, the consumer has to
+# catch up from the changelog table
+RESYNC = object()
+
+
+class Subscriber:
+    def __init__(self, buffer_size: int):
+        self._queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue(buffer_size)
+        self.overflowed = False
+
+    def offer(self, event: dict[str, Any]):
+        if self.overflowed:
+            return
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Never block the writer, drop everything and make the reader resync
+            self.overflowed = True
+
+    async def get(self) -> dict[str, Any] | object:
+        if self.overflowed:
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            self.overflowed = False
+            return RESYNC
+        return await self._queue.get()
+
+
+class ChangeBus:
+    """In-process publish/subscribe of committed product and catalog changes."""
+
+    def __init__(self, buffer_size: int = 1000):
+        self.buffer_size = buffer_size
+        self._subscribers: set[Subscriber] = set()
+
+    def subscribe(self) -> Subscriber:
+        subscriber = Subscriber(self.buffer_size)
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self._subscribers.discard(subscriber)
+
+    def publish(self, event: dict[str, Any]):
+        for subscriber in self._subscribers:
+            subscriber.offer(event)
+
+
+change_bus = ChangeBus(buffer_size=settings.CHANGES_BUFFER_SIZE)
@@ -0,0 +1,67 @@
+import asyncio
+from time import monotonic
+from typing import Any, Awaitable, Callable, Hashable
+
+from services.config import settings
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical reads: while a call for `key` is in flight,
+    other callers await its result instead of running their own query. With
+    `ttl > 0` a finished result is also reused for that many seconds.
+    """
+
+    def __init__(self, ttl: float = 0.0):
+        self.ttl = ttl
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+        self._results: dict[Hashable, tuple[float, Any]] = {}
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        while True:
+            cached = self._results.get(key)
+            if cached and cached[0] > monotonic():
+                self.shared += 1
+                return cached[1]
+
+            future = self._inflight.get(key)
+            if future is None:
+                break
+            try:
+                # shield so a follower giving up doesn't cancel the shared call
+                result = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if future.cancelled():
+                    # The leader was cancelled, someone has to run it again
+                    continue
+                raise
+            self.shared += 1
+            return result
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        self.calls += 1
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody else was waiting
+            raise
+        else:
+            future.set_result(result)
+            if self.ttl > 0:
+                self._results[key] = (monotonic() + self.ttl, result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
+
+    def clear(self):
+        self._results.clear()
+
+
+single_flight = SingleFlight(ttl=settings.SINGLE_FLIGHT_TTL)
@@ -1,4 +1,5 @@
 from functools import lru_cache
+from typing import Literal
 
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -6,6 +7,79 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
     DATABASE_URL: str = Field(default=None, alias="DATABASE_URL")
+    # Logs every statement, prefer the profiling header to look at one request
+    DB_ECHO: bool = False
+    # Server processes, each with its own connection pool
+    WORKERS: int = 1
+    # Connections all workers may open together, split evenly between them.
+    # DB_POOL_SIZE / DB_MAX_OVERFLOW override the derived per-worker values.
+    DB_CONNECTION_BUDGET: int = 50
+    DB_POOL_SIZE: int | None = None
+    DB_MAX_OVERFLOW: int | None = None
+    # "verify" checks the Alembic revision, "create_all" creates missing tables
+    # (local development and fresh databases), "skip" does neither
+    DB_STARTUP_MODE: Literal["verify", "create_all", "skip"] = "verify"
+    # Number of pool connections to open during startup
+    DB_POOL_PREWARM: int = 0
+
+    # Requests admitted beyond the pool capacity wait in a bounded queue and
+    # are rejected with 503 once it is full or they waited too long
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_QUEUE_SIZE: int = 100
+    ADMISSION_QUEUE_TIMEOUT: float = 2.0
+
+    COUNT_CACHE_TTL: float = 30.0
+    CATALOG_DELETE_BATCH_SIZE: int = 1000
+
+    # Level of the loguru handler, per-row ETL messages are DEBUG
+    LOG_LEVEL: str = "INFO"
+
+    # Rejected ETL rows are written here, only the most recent files are kept
+    ETL_REJECTS_DIR: str = "/tmp/etl_rejects"
+    ETL_REJECTS_KEEP: int = 50
+    # ETL feeds are read in chunks of this many rows; the duplicate detection
+    # keeps at most ETL_DEDUP_MAX_KEYS keys in memory (about 60 bytes each)
+    ETL_CHUNK_SIZE: int = 50_000
+    ETL_DEDUP_MAX_KEYS: int = 2_000_000
+
+    # Events buffered per change feed subscriber before it has to resync
+    CHANGES_BUFFER_SIZE: int = 1000
+    # Most recent changelog entries kept, 0 keeps all. Change feeds resuming
+    # from an older position get a resync event.
+    CHANGES_RETENTION: int = 100_000
+    # Seconds a coalesced read result may be reused, 0 only shares in-flight calls
+    SINGLE_FLIGHT_TTL: float = 0.0
+    # Catalog and top-N responses shared by all workers, on by default with
+    # more than one worker. Entries are invalidated by writes through the API,
+    # the TTL bounds staleness from writes made elsewhere.
+    SHARED_CACHE_ENABLED: bool | None = None
+    SHARED_CACHE_DIR: str = ""
+    SHARED_CACHE_TTL: float = 60.0
+
+    # Requests sending this token in X-Profile-Token are profiled, and the
+    # token protects the profile endpoints. Empty disables both.
+    PROFILING_TOKEN: str = ""
+    # Share of all requests profiled at random, 0 disables sampling
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_INTERVAL: float = 0.005
+    PROFILING_DIR: str = "/tmp/profiles"
+    PROFILING_KEEP: int = 100
+
+    @property
+    def pool_limits(self) -> tuple[int, int]:
+        """`(pool_size, max_overflow)` of one worker, 2/5 of its share kept open."""
+        share = max(2, self.DB_CONNECTION_BUDGET // max(1, self.WORKERS))
+        pool_size = (
+            self.DB_POOL_SIZE
+            if self.DB_POOL_SIZE is not None
+            else max(1, share * 2 // 5)
+        )
+        max_overflow = (
+            self.DB_MAX_OVERFLOW
+            if self.DB_MAX_OVERFLOW is not None
+            else max(0, share - pool_size)
+        )
+        return pool_size, max_overflow
 
     model_config = SettingsConfigDict(
         env_file=".env", env_file_encoding="utf-8", case_sensitive=False, extra="ignore"
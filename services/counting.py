@@ -0,0 +1,87 @@
+from time import monotonic
+from typing import Any
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from services.config import settings
+from services.shared_cache import SharedVersions, shared_versions
+
+# Below this many rows an exact COUNT(*) is cheap enough to always run
+ESTIMATE_MIN_ROWS = 100_000
+
+
+class CountService:
+    """
+    Caches total row counts per (table, filters) so paginated endpoints don't
+    run a full COUNT(*) on every page. Write paths call `invalidate` for the
+    table they touched, and entries are dropped once the table's shared
+    version moved, which covers writes of other workers. The TTL only bounds
+    staleness from writes made outside the API.
+    """
+
+    def __init__(self, ttl: float = 30.0, versions: SharedVersions | None = None):
+        self.ttl = ttl
+        self.versions = versions or SharedVersions()
+        self._cache: dict[tuple, tuple[float, int, bool, int]] = {}
+
+    @staticmethod
+    def _key(table: str, filters: dict[str, Any]) -> tuple:
+        return table, tuple(sorted(filters.items()))
+
+    async def total(
+        self, db: AsyncSession, model, exact: bool = True, **filters: Any
+    ) -> tuple[int, bool]:
+        """
+        Returns `(total, estimated)` for rows of `model` matching `filters`
+        (equality only). With `exact=False` and no filters, PostgreSQL planner
+        statistics are used for large tables instead of COUNT(*).
+        """
+        table = model.__tablename__
+        key = self._key(table, filters)
+        version = self.versions.get(table)
+        cached = self._cache.get(key)
+        # An estimate can't satisfy a request for an exact total
+        if (
+            cached
+            and cached[0] > monotonic()
+            and cached[3] == version
+            and not (exact and cached[2])
+        ):
+            return cached[1], cached[2]
+
+        total, estimated = None, False
+        if not exact and not filters:
+            total = await self._estimate(db, table)
+            estimated = total is not None
+        if total is None:
+            statement = select(func.count()).select_from(model)
+            for column, value in filters.items():
+                statement = statement.where(getattr(model, column) == value)
+            total = await db.scalar(statement)
+
+        self._cache[key] = (monotonic() + self.ttl, total, estimated, version)
+        return total, estimated
+
+    @staticmethod
+    async def _estimate(db: AsyncSession, table: str) -> int | None:
+        if db.bind.dialect.name != "postgresql":
+            return None
+        # reltuples is -1 for tables that have never been vacuumed/analyzed
+        estimate = await db.scalar(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:t)"),
+            {"t": table},
+        )
+        if estimate is None or estimate < ESTIMATE_MIN_ROWS:
+            return None
+        return estimate
+
+    def invalidate(self, table: str | None = None):
+        if table is None:
+            self._cache.clear()
+            return
+        for key in [k for k in self._cache if k[0] == table]:
+            self._cache.pop(key, None)
+
+
+count_service = CountService(ttl=settings.COUNT_CACHE_TTL, versions=shared_versions)
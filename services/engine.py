@@ -1,10 +1,13 @@
+import asyncio
 from asyncio import current_task
 from contextlib import asynccontextmanager
+from pathlib import Path
 from typing import AsyncGenerator
 
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import (
     create_async_engine,
+    AsyncEngine,
     AsyncSession,
     async_scoped_session,
 )
@@ -13,8 +16,13 @@ from sqlmodel import SQLModel
 
 from services.config import settings
 
+pool_size, max_overflow = settings.pool_limits
 engine = create_async_engine(
-    settings.DATABASE_URL, echo=True, future=True, pool_size=20, max_overflow=30
+    settings.DATABASE_URL,
+    echo=settings.DB_ECHO,
+    future=True,
+    pool_size=pool_size,
+    max_overflow=max_overflow,
 )
 
 async_session = sessionmaker(
@@ -24,9 +32,43 @@ async_session = sessionmaker(
 AsyncScopedSession = async_scoped_session(async_session, scopefunc=current_task)
 
 
+ALEMBIC_INI = Path(__file__).resolve().parent.parent / "alembic.ini"
+
+
 async def init_db():
-    async with engine.begin() as conn:
-        await conn.run_sync(SQLModel.metadata.create_all)
+    if settings.DB_STARTUP_MODE == "create_all":
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+    elif settings.DB_STARTUP_MODE == "verify":
+        await verify_migrations()
+    if settings.DB_POOL_PREWARM:
+        await prewarm_pool(settings.DB_POOL_PREWARM)
+
+
+async def verify_migrations(db_engine: AsyncEngine = engine):
+    """Refuse to start unless the database is at the Alembic head revision."""
+    from alembic.config import Config
+    from alembic.runtime.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+
+    heads = set(ScriptDirectory.from_config(Config(str(ALEMBIC_INI))).get_heads())
+    async with db_engine.connect() as conn:
+        current = await conn.run_sync(
+            lambda sync_conn: set(
+                MigrationContext.configure(sync_conn).get_current_heads()
+            )
+        )
+    if current != heads:
+        raise RuntimeError(
+            f"Database revision {sorted(current) or 'none'} does not match "
+            f"migration head {sorted(heads)}, run `alembic upgrade head`"
+        )
+
+
+async def prewarm_pool(size: int, db_engine: AsyncEngine = engine):
+    """Open `size` connections up front so first requests don't pay for connecting."""
+    connections = await asyncio.gather(*(db_engine.connect() for _ in range(size)))
+    await asyncio.gather(*(conn.close() for conn in connections))
 
 
 # Generic async context manager for sessions
@@ -41,3 +83,8 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
             raise
         finally:
             await session.close()
+
+
+def get_session_factory():
+    """For handlers that open short sessions themselves, e.g. long-lived streams."""
+    return async_session
@@ -0,0 +1,102 @@
+import asyncio
+import os
+import re
+from collections import OrderedDict
+from pathlib import Path
+from typing import Awaitable, Callable
+from uuid import uuid4
+
+from schemas.jobs import Job
+from services.shared_cache import segment
+
+JOB_ID = re.compile(r"[0-9a-f]{32}")
+
+
+class JobRegistry:
+    """
+    Runs long operations as background tasks in this process and keeps their
+    progress for polling. Only the `max_jobs` most recent jobs are kept.
+
+    With a `directory` shared by the workers, every change of a job is also
+    written there, so any worker can answer for jobs started by another.
+    """
+
+    def __init__(self, max_jobs: int = 100, directory: Path | None = None):
+        self.max_jobs = max_jobs
+        self.directory = directory
+        self._jobs: OrderedDict[str, Job] = OrderedDict()
+        self._tasks: set[asyncio.Task] = set()
+        if directory is not None:
+            directory.mkdir(parents=True, exist_ok=True)
+
+    def spawn(
+        self, kind: str, fn: Callable[[Job], Awaitable[None]], total: int | None = None
+    ) -> Job:
+        job = Job(job_id=uuid4().hex, kind=kind, total=total)
+        self._jobs[job.job_id] = job
+        while len(self._jobs) > self.max_jobs:
+            self._jobs.popitem(last=False)
+        self._save(job)
+        self._prune()
+
+        task = asyncio.create_task(self._run(job, fn))
+        # Keep a reference, the event loop only holds weak ones
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def _run(self, job: Job, fn: Callable[[Job], Awaitable[None]]):
+        job.status = "running"
+        self._save(job)
+        try:
+            await fn(job)
+        except Exception as e:
+            from loguru import logger  # not needed unless a job fails
+
+            logger.exception(f"Job {job.kind} {job.job_id} failed")
+            job.status = "failed"
+            job.error = str(e)
+        else:
+            job.status = "completed"
+        self._save(job)
+
+    def progress(self, job: Job, processed: int):
+        job.processed += processed
+        self._save(job)
+
+    def get(self, job_id: str) -> Job | None:
+        job = self._jobs.get(job_id)
+        if job or self.directory is None or not JOB_ID.fullmatch(job_id):
+            return job
+        try:
+            return Job.model_validate_json(
+                (self.directory / f"{job_id}.json").read_text()
+            )
+        except (OSError, ValueError):
+            return None
+
+    def _save(self, job: Job):
+        if self.directory is None:
+            return
+        path = self.directory / f"{job.job_id}.json"
+        # Written aside and renamed so readers never see a partial job
+        temporary = path.with_suffix(f".{os.getpid()}.tmp")
+        temporary.write_text(job.model_dump_json())
+        os.replace(temporary, path)
+
+    def _prune(self):
+        if self.directory is None:
+            return
+
+        def modified(path: Path) -> float:
+            try:
+                return path.stat().st_mtime
+            except OSError:
+                return 0.0  # pruned by another worker meanwhile
+
+        files = sorted(self.directory.glob("*.json"), key=modified, reverse=True)
+        for old in files[self.max_jobs :]:
+            old.unlink(missing_ok=True)
+
+
+jobs = JobRegistry(directory=segment / "jobs" if segment else None)
@@ -0,0 +1,64 @@
+"""
+Brings the database to the Alembic head revision before the API starts.
+
+    python -m services.migrate
+
+An empty database gets the tables of the current models and is stamped at
+head, a database created by `create_all` before migrations existed is stamped
+at the first revision (whose schema it has) and upgraded, anything else is
+upgraded to head.
+"""
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, inspect, pool
+from sqlmodel import SQLModel
+
+from services.config import settings
+from services.engine import ALEMBIC_INI
+
+# The revision matching the tables `create_all` used to make on startup
+BASELINE_REVISION = "c6a172b4d8f7"
+
+
+def sync_url(url: str) -> str:
+    """Alembic runs on a blocking driver."""
+    for async_driver, sync_driver in (
+        ("postgresql+asyncpg", "postgresql+psycopg2"),
+        ("sqlite+aiosqlite", "sqlite"),
+    ):
+        if url.startswith(async_driver):
+            return sync_driver + url[len(async_driver) :]
+    return url
+
+
+def migrate(database_url: str = settings.DATABASE_URL) -> str:
+    """Returns what was done: `created`, `adopted` or `upgraded`."""
+    import models  # noqa: F401, registers the tables on SQLModel.metadata
+
+    engine = create_engine(sync_url(database_url), poolclass=pool.NullPool)
+    config = Config(str(ALEMBIC_INI))
+    try:
+        # Not engine.begin(), migrations building indexes concurrently
+        # commit the transaction Alembic opens themselves
+        with engine.connect() as connection:
+            config.attributes["connection"] = connection
+            tables = set(inspect(connection).get_table_names())
+            connection.commit()
+            if not tables - {"alembic_version"}:
+                SQLModel.metadata.create_all(connection)
+                connection.commit()
+                command.stamp(config, "head")
+                return "created"
+            if "alembic_version" not in tables:
+                command.stamp(config, BASELINE_REVISION)
+                command.upgrade(config, "head")
+                return "adopted"
+            command.upgrade(config, "head")
+            return "upgraded"
+    finally:
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    print(f"Database {migrate()}")
@@ -8,6 +8,13 @@ M = TypeVar("M")
 
 class PaginatedResponse(BaseModel, Generic[M]):
     count: int = Field(description="Number of items returned in the response")
+    total: int | None = Field(
+        default=None, description="Total number of items matching the criteria"
+    )
+    estimated: bool = Field(
+        default=False,
+        description="Whether `total` is a planner estimate rather than an exact count",
+    )
     items: Sequence[M] = Field(
         description="List of items returned in the response following given criteria"
     )
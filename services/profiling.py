@@ -0,0 +1,260 @@
+import asyncio
+import hmac
+import json
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from uuid import uuid4
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from services.config import settings
+
+PROFILE_HEADER = b"x-profile-token"
+PROFILE_ID = re.compile(r"[0-9a-f]{32}")
+
+
+class Profile:
+    """CPU samples and SQL statements of one request."""
+
+    def __init__(self, method: str, path: str):
+        self.profile_id = uuid4().hex
+        self.method = method
+        self.path = path
+        self.started_at = datetime.now()
+        self.status: int | None = None
+        self.duration: float | None = None
+        self.samples: Counter[str] = Counter()
+        self.sql: list[dict] = []
+        self._start = time.perf_counter()
+        self._task: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread_id: int | None = None
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._start
+
+    def summary(self) -> dict:
+        return {
+            "profile_id": self.profile_id,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "started_at": self.started_at.isoformat(),
+            "duration": self.duration,
+            "samples": sum(self.samples.values()),
+            "queries": len(self.sql),
+        }
+
+    def as_dict(self) -> dict:
+        return {
+            **self.summary(),
+            # Collapsed stacks, "outer;inner;leaf": count, as read by flamegraph tools
+            "stacks": dict(self.samples.most_common()),
+            "sql": self.sql,
+        }
+
+
+class Sampler:
+    """
+    Statistical CPU profiler. A single background thread wakes up every
+    `interval` seconds and records the stack of the event loop thread for each
+    profile whose task is the one running at that moment, so concurrent
+    requests on the same loop don't end up in each other's profile.
+    The thread only runs while there is a profile to sample.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self._profiles: set[Profile] = set()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def start(self, profile: Profile):
+        profile._task = asyncio.current_task()
+        profile._loop = asyncio.get_running_loop()
+        profile._thread_id = threading.get_ident()
+        with self._lock:
+            self._profiles.add(profile)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="profiling-sampler", daemon=True
+                )
+                self._thread.start()
+
+    def stop(self, profile: Profile):
+        with self._lock:
+            self._profiles.discard(profile)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._profiles:
+                    self._thread = None
+                    return
+                profiles = list(self._profiles)
+            frames = sys._current_frames()
+            for profile in profiles:
+                frame = frames.get(profile._thread_id)
+                if (
+                    frame is None
+                    or asyncio.current_task(profile._loop) is not profile._task
+                ):
+                    continue
+                profile.samples[collapse(frame)] += 1
+
+
+def collapse(frame) -> str:
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(stack))
+
+
+class ProfileStore:
+    """The last `keep` profiles, one JSON file each."""
+
+    def __init__(self, directory: str, keep: int = 100):
+        self.directory = Path(directory)
+        self.keep = keep
+
+    def save(self, profile: Profile):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{profile.profile_id}.json"
+        path.write_text(json.dumps(profile.as_dict(), default=str))
+        for old in self._files()[self.keep :]:
+            old.unlink(missing_ok=True)
+
+    def _files(self) -> list[Path]:
+        if not self.directory.is_dir():
+            return []
+        files = self.directory.glob("*.json")
+        return sorted(files, key=lambda p: p.stat().st_mtime, reverse=True)
+
+    def list(self) -> list[dict]:
+        """Summaries of the stored profiles, newest first."""
+        summaries = []
+        for path in self._files():
+            try:
+                data = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue  # pruned or being written concurrently
+            summaries.append(
+                {k: v for k, v in data.items() if k not in ("stacks", "sql")}
+            )
+        return summaries
+
+    def path(self, profile_id: str) -> Path | None:
+        if not PROFILE_ID.fullmatch(profile_id):
+            return None
+        path = self.directory / f"{profile_id}.json"
+        return path if path.is_file() else None
+
+
+_current: ContextVar[Profile | None] = ContextVar("profile", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("profile_query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current.get()
+    if profile is None:
+        return
+    starts = conn.info.get("profile_query_start")
+    if not starts:
+        return
+    started = starts.pop()
+    profile.sql.append(
+        {
+            "offset": round(started - profile._start, 6),
+            "duration": round(time.perf_counter() - started, 6),
+            "statement": statement,
+            "executemany": executemany,
+        }
+    )
+
+
+# Profile listing and downloads are never profiled themselves
+EXCLUDED_PREFIXES = ("/api/v1/system/profiles",)
+
+
+class ProfilingMiddleware:
+    """
+    Profiles a request when it carries the `X-Profile-Token` header with the
+    configured token, or at random for a `sample_rate` share of requests.
+    The profile id is returned in the `X-Profile-Id` response header.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        store: ProfileStore,
+        sampler: Sampler,
+        token: str = "",
+        sample_rate: float = 0.0,
+    ):
+        self.app = app
+        self.store = store
+        self.sampler = sampler
+        self.token = token.encode()
+        self.sample_rate = sample_rate
+
+    def _wanted(self, scope: Scope) -> bool:
+        if self.sample_rate and random.random() < self.sample_rate:
+            return True
+        if self.token:
+            for name, value in scope["headers"]:
+                if name == PROFILE_HEADER:
+                    return hmac.compare_digest(value, self.token)
+        return False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if (
+            scope["type"] != "http"
+            or not self._wanted(scope)
+            or scope["path"].startswith(EXCLUDED_PREFIXES)
+        ):
+            # The only work done for requests that are not profiled
+            await self.app(scope, receive, send)
+            return
+
+        profile = Profile(scope["method"], scope["path"])
+
+        async def send_with_id(message: Message):
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"x-profile-id", profile.profile_id.encode()),
+                ]
+            await send(message)
+
+        token = _current.set(profile)
+        self.sampler.start(profile)
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            self.sampler.stop(profile)
+            _current.reset(token)
+            profile.duration = round(profile.elapsed(), 6)
+            self.store.save(profile)
+
+
+profile_store = ProfileStore(settings.PROFILING_DIR, keep=settings.PROFILING_KEEP)
+sampler = Sampler(interval=settings.PROFILING_INTERVAL)
@@ -0,0 +1,380 @@
+from sqlalchemy import Column, MetaData, Table, exists, func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import SQLModel
+
+from models.changes import ChangeLog
+from models.columnar import ColumnBatch, row_chunks
+from services.coalescing import single_flight
+from services.counting import count_service
+
+
+class ReloadError(ValueError):
+    def __init__(self, message: str, report: dict | None = None):
+        super().__init__(message)
+        self.report = report
+
+
+class FullReload:
+    """
+    Replaces the whole content of a table with a new feed.
+
+    Rows are bulk loaded into an index-less `<table>_staging` copy, checked for
+    row count, nulls, duplicate keys or unique values and foreign key orphans,
+    then indexes and constraints are built and the staging table is swapped in
+    by renames in one short transaction. Readers keep using the live table until the swap.
+    The replaced table is kept as `<table>_previous` for `rollback`.
+
+    Building indexes and swapping require PostgreSQL.
+    """
+
+    def __init__(self, model, chunk_size: int = 10_000, lock_timeout: str = "5s"):
+        self.model = model
+        self.table: Table = model.__table__
+        self.name = self.table.name
+        self.staging_name = f"{self.name}_staging"
+        self.previous_name = f"{self.name}_previous"
+        self.chunk_size = chunk_size
+        self.lock_timeout = lock_timeout
+        # All columns nullable so bad rows are reported by `validate`
+        # instead of failing the load halfway
+        self.staging = Table(
+            self.staging_name,
+            MetaData(),
+            *(Column(c.name, c.type, nullable=True) for c in self.table.columns),
+        )
+        # The replaced version, as checked before `rollback` swaps it back
+        self.previous = Table(
+            self.previous_name,
+            MetaData(),
+            *(Column(c.name, c.type) for c in self.table.columns),
+        )
+        (self.pk,) = [c.name for c in self.table.primary_key.columns]
+
+    async def run(self, db: AsyncSession, batch: ColumnBatch) -> dict:
+        self._require_postgresql(db)
+        await self.prepare(db)
+        rows = await self.load(db, batch)
+        report = await self.validate(db, expected_rows=rows)
+        await self.build_indexes(db)
+        await self.swap(db)
+        return report
+
+    @staticmethod
+    def _require_postgresql(db: AsyncSession):
+        if db.bind.dialect.name != "postgresql":
+            raise ReloadError("Full reload is only supported on PostgreSQL")
+
+    def _quote(self, db: AsyncSession, name: str) -> str:
+        return db.bind.dialect.identifier_preparer.quote(name)
+
+    async def prepare(self, db: AsyncSession):
+        conn = await db.connection()
+        await conn.run_sync(self.staging.drop, checkfirst=True)
+        await conn.run_sync(self.staging.create)
+        await db.commit()
+
+    async def load(self, db: AsyncSession, batch: ColumnBatch) -> int:
+        loaded = 0
+        for rows in row_chunks(self.model, batch, self.chunk_size):
+            await db.execute(insert(self.staging), rows)
+            await db.commit()
+            loaded += len(rows)
+        return loaded
+
+    async def validate(self, db: AsyncSession, expected_rows: int) -> dict:
+        staging = self.staging
+
+        async def count(*criteria) -> int:
+            statement = select(func.count()).select_from(staging)
+            for criterion in criteria:
+                statement = statement.where(criterion)
+            return await db.scalar(statement)
+
+        problems = []
+        rows = await count()
+        if rows == 0:
+            problems.append("feed is empty")
+        if rows != expected_rows:
+            problems.append(f"expected {expected_rows} rows, staged {rows}")
+
+        nulls = {}
+        for column in self.table.columns:
+            if not column.nullable:
+                nulls[column.name] = await count(staging.c[column.name].is_(None))
+                if nulls[column.name]:
+                    problems.append(f"{nulls[column.name]} rows without {column.name}")
+
+        distinct_keys = await db.scalar(
+            select(func.count(staging.c[self.pk].distinct()))
+        )
+        duplicate_keys = rows - distinct_keys - nulls.get(self.pk, 0)
+        if duplicate_keys:
+            problems.append(f"{duplicate_keys} duplicate {self.pk} values")
+
+        # Would fail the unique indexes built after validation, e.g. dedup_key
+        # of products the loader's Deduplicator had stopped remembering
+        duplicate_values = {}
+        for name in self._unique_columns():
+            column = staging.c[name]
+            distinct = await db.scalar(select(func.count(column.distinct())))
+            duplicate_values[name] = await count(column.is_not(None)) - distinct
+            if duplicate_values[name]:
+                problems.append(f"{duplicate_values[name]} duplicate {name} values")
+
+        orphans = await self._orphans(db, staging)
+        problems.extend(self._orphan_problems(orphans))
+
+        report = {
+            "rows": rows,
+            "nulls": nulls,
+            "duplicate_keys": duplicate_keys,
+            "duplicate_values": duplicate_values,
+            "orphans": orphans,
+        }
+        if problems:
+            raise ReloadError("Quality checks failed: " + "; ".join(problems), report)
+        return report
+
+    def _unique_columns(self) -> list[str]:
+        """Columns other than the primary key with a single-column unique index."""
+        names = [c.name for c in self.table.columns if c.unique]
+        names += [
+            index.columns[0].name
+            for index in self.table.indexes
+            if index.unique and len(index.columns) == 1
+        ]
+        return [name for name in dict.fromkeys(names) if name != self.pk]
+
+    async def _orphans(self, db: AsyncSession, incoming: Table) -> dict[str, int]:
+        """References left dangling if `incoming` replaced the live table."""
+
+        async def count(source, *criteria) -> int:
+            statement = select(func.count()).select_from(source)
+            for criterion in criteria:
+                statement = statement.where(criterion)
+            return await db.scalar(statement)
+
+        orphans = {}
+        # Rows of the incoming version pointing at missing parents
+        for fk in self.table.foreign_keys:
+            child, parent = incoming.c[fk.parent.name], fk.column
+            key = f"{self.name}.{fk.parent.name}"
+            orphans[key] = await count(
+                incoming, child.is_not(None), ~exists().where(parent == child)
+            )
+        # Existing children that would lose their parent after the swap
+        for table in SQLModel.metadata.tables.values():
+            for fk in table.foreign_keys:
+                if fk.column.table is not self.table:
+                    continue
+                child, parent = fk.parent, incoming.c[fk.column.name]
+                key = f"{table.name}.{child.name}"
+                orphans[key] = await count(
+                    table, child.is_not(None), ~exists().where(parent == child)
+                )
+        return orphans
+
+    @staticmethod
+    def _orphan_problems(orphans: dict[str, int]) -> list[str]:
+        return [
+            f"{orphan_rows} orphaned {key} references"
+            for key, orphan_rows in orphans.items()
+            if orphan_rows
+        ]
+
+    def _staged(self, name: str) -> str:
+        return name.replace(self.name, self.staging_name, 1)
+
+    async def build_indexes(self, db: AsyncSession):
+        self._require_postgresql(db)
+        q = lambda name: self._quote(db, name)  # noqa: E731
+        staging = q(self.staging_name)
+
+        for column in self.table.columns:
+            if not column.nullable:
+                await db.execute(
+                    text(
+                        f"ALTER TABLE {staging} "
+                        f"ALTER COLUMN {q(column.name)} SET NOT NULL"
+                    )
+                )
+        pkey = q(self._staged(f"{self.name}_pkey"))
+        await db.execute(
+            text(
+                f"ALTER TABLE {staging} ADD CONSTRAINT {pkey} "
+                f"PRIMARY KEY ({q(self.pk)})"
+            )
+        )
+        for index in self.table.indexes:
+            columns = ", ".join(q(c.name) for c in index.columns)
+            unique = "UNIQUE " if index.unique else ""
+            await db.execute(
+                text(
+                    f"CREATE {unique}INDEX {q(self._staged(index.name))} "
+                    f"ON {staging} ({columns})"
+                )
+            )
+        for fk in self.table.foreign_keys:
+            name = self._staged(f"{self.name}_{fk.parent.name}_fkey")
+            # NOT VALID + VALIDATE avoids a long lock on the parent table
+            await db.execute(
+                text(
+                    f"ALTER TABLE {staging} ADD CONSTRAINT {q(name)} "
+                    f"FOREIGN KEY ({q(fk.parent.name)}) "
+                    f"REFERENCES {q(fk.column.table.name)} ({q(fk.column.name)}) "
+                    "NOT VALID"
+                )
+            )
+            await db.commit()
+            await db.execute(
+                text(f"ALTER TABLE {staging} VALIDATE CONSTRAINT {q(name)}")
+            )
+        await db.commit()
+
+    async def _rename(self, db: AsyncSession, old: str, new: str):
+        """Renames a table along with its indexes and foreign keys."""
+        q = lambda name: self._quote(db, name)  # noqa: E731
+        await db.execute(text(f"ALTER TABLE {q(old)} RENAME TO {q(new)}"))
+
+        indexes = await db.scalars(
+            text(
+                "SELECT indexname FROM pg_indexes "
+                "WHERE schemaname = current_schema() AND tablename = :t"
+            ),
+            {"t": new},
+        )
+        for index in indexes.all():
+            if old in index:
+                renamed = index.replace(old, new, 1)
+                await db.execute(text(f"ALTER INDEX {q(index)} RENAME TO {q(renamed)}"))
+
+        constraints = await db.scalars(
+            text(
+                "SELECT conname FROM pg_constraint "
+                "WHERE conrelid = to_regclass(:t) AND contype = 'f'"
+            ),
+            {"t": new},
+        )
+        for constraint in constraints.all():
+            if old in constraint:
+                renamed = constraint.replace(old, new, 1)
+                await db.execute(
+                    text(
+                        f"ALTER TABLE {q(new)} "
+                        f"RENAME CONSTRAINT {q(constraint)} TO {q(renamed)}"
+                    )
+                )
+
+    async def _exchange(self, db: AsyncSession, incoming: str):
+        """Makes `incoming` the live table and keeps the current one as previous."""
+        q = lambda name: self._quote(db, name)  # noqa: E731
+        sequence = await db.scalar(
+            text("SELECT pg_get_serial_sequence(:t, :c)"),
+            {"t": self.name, "c": self.pk},
+        )
+
+        # Fail fast instead of queueing behind long reads and blocking everyone
+        await db.execute(text(f"SET LOCAL lock_timeout = '{self.lock_timeout}'"))
+        if incoming == self.staging_name:
+            await db.execute(
+                text(f"DROP TABLE IF EXISTS {q(self.previous_name)} CASCADE")
+            )
+            await self._rename(db, self.name, self.previous_name)
+            await self._rename(db, self.staging_name, self.name)
+        else:
+            swap_name = f"{self.name}_swap"
+            await self._rename(db, self.name, swap_name)
+            await self._rename(db, self.previous_name, self.name)
+            await self._rename(db, swap_name, self.previous_name)
+
+        # The replaced version is only kept for `rollback`, which adds its
+        # foreign keys back against the live parents. Left in place, they
+        # would keep a parent it still references from being deleted.
+        constraints = await db.scalars(
+            text(
+                "SELECT conname FROM pg_constraint "
+                "WHERE conrelid = to_regclass(:t) AND contype = 'f'"
+            ),
+            {"t": self.previous_name},
+        )
+        for constraint in constraints.all():
+            await db.execute(
+                text(
+                    f"ALTER TABLE {q(self.previous_name)} "
+                    f"DROP CONSTRAINT {q(constraint)}"
+                )
+            )
+
+        if sequence:
+            # The sequence must belong to the live table or dropping the
+            # previous version later would drop it too
+            live_pk = f"{q(self.name)}.{q(self.pk)}"
+            await db.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {live_pk}"))
+            await db.execute(
+                text(
+                    f"ALTER TABLE {q(self.name)} ALTER COLUMN {q(self.pk)} "
+                    f"SET DEFAULT nextval('{sequence}'::regclass)"
+                )
+            )
+            await db.execute(
+                text(
+                    f"SELECT setval('{sequence}', "
+                    f"(SELECT COALESCE(MAX({q(self.pk)}), 0) + 1 "
+                    f"FROM {q(self.name)}), false)"
+                )
+            )
+
+        # Foreign keys follow renamed tables. Point those of other tables back
+        # at the live one, and the incoming table's own at the live parents:
+        # a parent swapped since this version was live is now `_previous` and
+        # gets dropped by its next reload, taking the constraint with it
+        repointed = []
+        for table in SQLModel.metadata.tables.values():
+            for fk in table.foreign_keys:
+                if table is not self.table and fk.column.table is not self.table:
+                    continue
+                name = f"{table.name}_{fk.parent.name}_fkey"
+                parent = fk.column.table.name
+                await db.execute(
+                    text(
+                        f"ALTER TABLE {q(table.name)} "
+                        f"DROP CONSTRAINT IF EXISTS {q(name)}, "
+                        f"ADD CONSTRAINT {q(name)} FOREIGN KEY ({q(fk.parent.name)}) "
+                        f"REFERENCES {q(parent)} ({q(fk.column.name)}) NOT VALID"
+                    )
+                )
+                repointed.append((table.name, name))
+        ChangeLog.record(
+            db, self.name, "reload" if incoming == self.staging_name else "rollback"
+        )
+        await db.commit()
+
+        for table_name, name in repointed:
+            await db.execute(
+                text(f"ALTER TABLE {q(table_name)} VALIDATE CONSTRAINT {q(name)}")
+            )
+            await db.commit()
+
+        count_service.invalidate(self.name)
+        single_flight.clear()
+
+    async def swap(self, db: AsyncSession):
+        self._require_postgresql(db)
+        await self._exchange(db, self.staging_name)
+
+    async def rollback(self, db: AsyncSession):
+        """Swaps the previous version back in, the replaced one becomes previous."""
+        self._require_postgresql(db)
+        if not await db.scalar(
+            text("SELECT to_regclass(:t)"), {"t": self.previous_name}
+        ):
+            raise ReloadError(f"No previous version of {self.name} to roll back to")
+        # Parents or children may have been reloaded since it was replaced
+        orphans = await self._orphans(db, self.previous)
+        problems = self._orphan_problems(orphans)
+        if problems:
+            raise ReloadError(
+                "Rollback would break references: " + "; ".join(problems),
+                {"orphans": orphans},
+            )
+        await self._exchange(db, self.previous_name)
@@ -0,0 +1,201 @@
+import fcntl
+import json
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+import time
+from hashlib import blake2b
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Hashable, Sequence
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from services.config import settings
+
+SLOT = struct.Struct("<q")
+
+
+def _digest(value: Any, size: int = 8) -> bytes:
+    return blake2b(repr(value).encode(), digest_size=size).digest()
+
+
+class SharedVersions:
+    """
+    A table of version counters in a memory-mapped file, readable by every
+    worker without a system call. Writers bump the version of a namespace
+    (a table name) after committing; caches compare versions to tell whether
+    an entry is still current. Namespaces are hashed to `slots` counters, a
+    collision only causes an extra invalidation.
+
+    Without a path the table is an anonymous mapping private to the process.
+    """
+
+    def __init__(self, path: Path | None = None, slots: int = 1024):
+        self.slots = slots
+        self.shared = path is not None
+        size = slots * SLOT.size
+        if path is None:
+            self._fd = None
+            self._map = mmap.mmap(-1, size)
+            return
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(self._fd).st_size < size:
+            # Workers may race here, extending to the same size is harmless
+            os.ftruncate(self._fd, size)
+        self._map = mmap.mmap(self._fd, size)
+
+    def _offset(self, namespace: str) -> int:
+        return int.from_bytes(_digest(namespace), "big") % self.slots * SLOT.size
+
+    def get(self, namespace: str) -> int:
+        return SLOT.unpack_from(self._map, self._offset(namespace))[0]
+
+    def snapshot(self, namespaces: Sequence[str]) -> list[int]:
+        return [self.get(namespace) for namespace in namespaces]
+
+    def bump(self, namespace: str):
+        offset = self._offset(namespace)
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            SLOT.pack_into(
+                self._map, offset, SLOT.unpack_from(self._map, offset)[0] + 1
+            )
+        finally:
+            if self._fd is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+
+class SharedCache:
+    """
+    Read-through cache of JSON responses shared by all workers, one file per
+    entry in the segment directory (tmpfs under /dev/shm when available).
+    An entry records the versions of the namespaces it was computed from and
+    is only served while they are unchanged and it is younger than `ttl`,
+    which bounds staleness from writes made outside the API.
+    """
+
+    def __init__(
+        self,
+        directory: Path | None,
+        versions: SharedVersions,
+        ttl: float = 60.0,
+        prune_every: int = 256,
+    ):
+        self.directory = directory
+        self.versions = versions
+        self.ttl = ttl
+        self.prune_every = prune_every
+        self.enabled = directory is not None and ttl > 0
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+
+    def _path(self, key: Hashable) -> Path:
+        return self.directory / f"{_digest(key, 16).hex()}.json"
+
+    def get(self, key: Hashable, versions: list[int]) -> tuple[bool, Any]:
+        try:
+            entry = json.loads(self._path(key).read_bytes())
+        except (OSError, ValueError):
+            return False, None
+        if entry["versions"] != versions or entry["expires"] < time.time():
+            return False, None
+        return True, entry["value"]
+
+    def set(self, key: Hashable, versions: list[int], value: Any):
+        entry = {
+            "versions": versions,
+            "expires": time.time() + self.ttl,
+            "value": value,
+        }
+        path = self._path(key)
+        # Written aside and renamed so readers never see a partial entry
+        temporary = path.with_suffix(f".{os.getpid()}.tmp")
+        temporary.write_text(json.dumps(entry))
+        os.replace(temporary, path)
+        self._writes += 1
+        if self._writes % self.prune_every == 0:
+            self.prune()
+
+    def prune(self):
+        """Removes expired entries, current ones are replaced in place."""
+        expired = time.time() - self.ttl
+        for path in self.directory.glob("*.json"):
+            try:
+                if path.stat().st_mtime < expired:
+                    path.unlink()
+            except OSError:
+                pass
+
+    async def fetch(
+        self, depends: Sequence[str], key: Hashable, fn: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """
+        Returns the cached result for `key` if none of the `depends`
+        namespaces changed since it was stored, otherwise calls `fn`. A hit is
+        returned as a JSONResponse of the stored JSON, so it isn't validated
+        against the response model again; a cached None stays None.
+        """
+        if not self.enabled:
+            return await fn()
+        # Taken before the query, a write committed meanwhile makes the entry stale
+        versions = self.versions.snapshot(depends)
+        found, value = self.get(key, versions)
+        if found:
+            self.hits += 1
+            return None if value is None else JSONResponse(value)
+        self.misses += 1
+        result = await fn()
+        self.set(key, versions, jsonable_encoder(result))
+        return result
+
+
+def segment_directory(base: str = "") -> Path:
+    """
+    Directory shared by the workers of one server. Workers are started by
+    the same supervisor, so its pid names the segment and a restart starts
+    from an empty one. Segments of servers that are gone are removed.
+    """
+    root = Path(
+        base or ("/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir())
+    )
+    root = root / "catalog-api"
+    root.mkdir(parents=True, exist_ok=True)
+    for stale in root.iterdir():
+        if not stale.name.isdigit():
+            continue
+        try:
+            os.kill(int(stale.name), 0)
+        except ProcessLookupError:
+            shutil.rmtree(stale, ignore_errors=True)
+        except PermissionError:
+            pass  # alive, owned by someone else
+    server = os.getppid() if settings.WORKERS > 1 else os.getpid()
+    directory = root / str(server)
+    directory.mkdir(exist_ok=True)
+    return directory
+
+
+def _shared_cache_enabled() -> bool:
+    if settings.SHARED_CACHE_ENABLED is None:
+        return settings.WORKERS > 1
+    return settings.SHARED_CACHE_ENABLED
+
+
+# State shared by the workers of this server, None with a single worker and
+# the cache disabled
+segment = (
+    segment_directory(settings.SHARED_CACHE_DIR)
+    if settings.WORKERS > 1 or _shared_cache_enabled()
+    else None
+)
+if _shared_cache_enabled():
+    shared_versions = SharedVersions(segment / "versions")
+    shared_cache = SharedCache(segment, shared_versions, ttl=settings.SHARED_CACHE_TTL)
+else:
+    shared_versions = SharedVersions()
+    shared_cache = SharedCache(None, shared_versions)
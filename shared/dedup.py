@@ -0,0 +1,47 @@
+import unicodedata
+from hashlib import blake2b
+
+
+def normalize_name(name: str) -> str:
+    """
+    Canonical form of a name: NFKC unicode normalization (full-width and
+    compatibility characters, composed accents) and whitespace collapsed to
+    single spaces. Case is kept, `dedup_key` compares case-insensitively.
+    """
+    return " ".join(unicodedata.normalize("NFKC", name).split())
+
+
+def dedup_key(name: str, catalog_id: int | None) -> int:
+    """
+    64-bit hash of the normalized name and catalog, as a signed integer so it
+    fits a BIGINT column. Collisions are negligible below billions of rows.
+    """
+    value = f"{normalize_name(name).casefold()}\x1f{catalog_id}".encode()
+    return int.from_bytes(blake2b(value, digest_size=8).digest(), "big", signed=True)
+
+
+class Deduplicator:
+    """
+    Remembers the keys seen during one load, across chunks of the feed.
+
+    At most `max_keys` keys are kept in memory. Past that, new keys are not
+    remembered anymore and later duplicates of them are left to the unique
+    index on `product.dedup_key`.
+    """
+
+    def __init__(self, max_keys: int = 2_000_000):
+        self.max_keys = max_keys
+        self.duplicates = 0
+        self.overflowed = False
+        self._seen: set[int] = set()
+
+    def add(self, key: int) -> bool:
+        """Returns False if the key was already seen."""
+        if key in self._seen:
+            self.duplicates += 1
+            return False
+        if len(self._seen) < self.max_keys:
+            self._seen.add(key)
+        else:
+            self.overflowed = True
+        return True
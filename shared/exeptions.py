@@ -9,3 +9,31 @@ class ProductNotFound(HTTPException):
 class CatalogNotFound(HTTPException):
     def __init__(self):
         super().__init__(status_code=404, detail="Catalog not found")
+
+
+class ProductAlreadyExists(HTTPException):
+    def __init__(self):
+        super().__init__(
+            status_code=409,
+            detail="A product with this name already exists in the catalog",
+        )
+
+
+class ServerBusy(HTTPException):
+    def __init__(self, retry_after: int = 1):
+        super().__init__(
+            status_code=503,
+            detail="Server is busy, please retry later",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+class ReassignConflict(HTTPException):
+    def __init__(self, names: list[str], shown: int = 20):
+        listed = ", ".join(names[:shown])
+        if len(names) > shown:
+            listed += f" and {len(names) - shown} more"
+        super().__init__(
+            status_code=409,
+            detail=f"The target catalog already has products named {listed}",
+        )
@@ -0,0 +1,90 @@
+import csv
+import re
+from collections import Counter
+from pathlib import Path
+from uuid import uuid4
+
+from schemas.etl import EtlReport
+from services.config import settings
+
+REPORT_ID = re.compile(r"[0-9a-f]{32}")
+
+
+def rejects_path(report_id: str) -> Path | None:
+    """Path of the rejected rows file of a report, None if there is none."""
+    if not REPORT_ID.fullmatch(report_id):
+        return None
+    path = Path(settings.ETL_REJECTS_DIR) / f"{report_id}.csv"
+    return path if path.is_file() else None
+
+
+class QualityReport:
+    """
+    Aggregates the outcome of an ETL load: counters by rejection reason, null
+    counts per column and a bounded sample of rejected rows. Every rejected
+    row is also streamed to a CSV side file instead of being logged.
+    """
+
+    def __init__(
+        self, entity: str, columns: list[str] | None = None, sample_size: int = 20
+    ):
+        self.report_id = uuid4().hex
+        self.entity = entity
+        self.columns = columns or []
+        self.sample_size = sample_size
+        self.total_rows = 0
+        self.accepted = 0
+        self.reasons: Counter[str] = Counter()
+        self.null_counts: dict[str, int] = {}
+        self.samples: list[dict] = []
+        self.duplicates = 0
+        self._file = None
+        self._writer = None
+        self.rejects_file: Path | None = None
+
+    def reject(self, reason: str, row: dict):
+        self.reasons[reason] += 1
+        if len(self.samples) < self.sample_size:
+            self.samples.append({**row, "reason": reason})
+        if self._writer is None:
+            self._open_rejects_file()
+        self._writer.writerow({**row, "reason": reason})
+
+    def accept(self):
+        self.accepted += 1
+
+    def _open_rejects_file(self):
+        directory = Path(settings.ETL_REJECTS_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        # Keep the directory bounded, oldest files go first
+        existing = sorted(directory.glob("*.csv"), key=lambda p: p.stat().st_mtime)
+        for old in existing[: max(0, len(existing) - settings.ETL_REJECTS_KEEP + 1)]:
+            old.unlink(missing_ok=True)
+
+        self.rejects_file = directory / f"{self.report_id}.csv"
+        self._file = open(self.rejects_file, "w", newline="")
+        self._writer = csv.DictWriter(
+            self._file, fieldnames=[*self.columns, "reason"], extrasaction="ignore"
+        )
+        self._writer.writeheader()
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def summary(self) -> EtlReport:
+        return EtlReport(
+            report_id=self.report_id,
+            entity=self.entity,
+            total_rows=self.total_rows,
+            accepted=self.accepted,
+            rejected=sum(self.reasons.values()),
+            duplicates=self.duplicates,
+            reasons=dict(self.reasons),
+            null_counts=self.null_counts,
+            samples=self.samples,
+            rejects_url=(
+                f"/api/v1/etl/rejects/{self.report_id}" if self.rejects_file else None
+            ),
+        )
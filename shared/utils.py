@@ -2,7 +2,10 @@ from datetime import datetime
 
 import pandas as pd
 from loguru import logger
-from models import Catalog, Product
+
+from services.config import settings
+from shared.dedup import Deduplicator, dedup_key, normalize_name
+from shared.quality import QualityReport
 
 
 def parse_datetime(date_val):
@@ -15,86 +18,280 @@ def parse_datetime(date_val):
         return date_val.to_pydatetime()
     try:
         return pd.to_datetime(date_val).to_pydatetime()
-    except Exception as e:
-        logger.warning(f"Invalid date format: {date_val}")
+    except Exception:
+        logger.debug("Invalid date format: {}", date_val)
         return None
 
 
-def load_catalogs(file, raise_on_error=False):
+def read_feed(file, report: QualityReport, parse_dates: list[str]):
+    """
+    Yields the rows of a CSV feed as dicts, reading ETL_CHUNK_SIZE rows at a
+    time, and counts rows and nulls into the report.
+    """
     file.seek(0)
-    df = pd.read_csv(file, parse_dates=["created_at"])
-    logger.info(f"Loaded {len(df)} rows from catalog file")
-    success, skips = 0, 0
-    catalogs = []
-    for _, row in df.iterrows():
+    chunks = pd.read_csv(
+        file, parse_dates=parse_dates, chunksize=settings.ETL_CHUNK_SIZE
+    )
+    for chunk in chunks:
+        columns = list(chunk.columns)
+        report.columns = report.columns or columns
+        report.total_rows += len(chunk)
+        for column, nulls in chunk.isna().sum().items():
+            report.null_counts[column] = report.null_counts.get(column, 0) + int(nulls)
+        # Builds no Series per row like iterrows
+        for values in zip(*(chunk[column] for column in columns)):
+            yield dict(zip(columns, values))
+
+
+def _printable(row: dict) -> dict:
+    return {
+        key: (
+            None
+            if pd.isna(value)
+            else str(value) if isinstance(value, pd.Timestamp) else value
+        )
+        for key, value in row.items()
+    }
+
+
+def reject(
+    report: QualityReport, reason: str, row: dict, raise_on_error: bool, message: str
+):
+    if raise_on_error:
+        report.close()
+        raise ValueError(message)
+    logger.debug("Skipping row ({}): {}", reason, row)
+    report.reject(reason, _printable(row))
+
+
+def load_catalogs(file, raise_on_error=False, with_ids=False):
+    """
+    Returns the valid catalogs as columns and a QualityReport of the rest.
+    """
+    report = QualityReport("catalogs")
+    # Built column by column and handed to Catalog.bulk_create as is
+    catalogs = {"name": [], "created_at": []}
+    if with_ids:
+        catalogs["catalog_id"] = []
+    seen_ids = set()
+    for row in read_feed(file, report, parse_dates=["created_at"]):
         name = row.get("name")
-        created_at = parse_datetime(row.get("created_at"))
+        catalog_id = row.get("catalog_id") if with_ids else None
 
-        if not (name and created_at):
-            logger.warning(
-                "Skipping row with missing or invalid 'name' or 'created_at'"
+        if with_ids and pd.isna(catalog_id):
+            reject(
+                report,
+                "missing_id",
+                row,
+                raise_on_error,
+                "Row must contain 'catalog_id'",
+            )
+            continue
+        if with_ids and int(catalog_id) in seen_ids:
+            reject(
+                report,
+                "duplicate_key",
+                row,
+                raise_on_error,
+                f"Duplicate catalog_id {int(catalog_id)}",
+            )
+            continue
+        name = None if pd.isna(name) else normalize_name(str(name))
+        if not name:
+            reject(
+                report,
+                "missing_name",
+                row,
+                raise_on_error,
+                "Row must contain valid 'name' and 'created_at'",
+            )
+            continue
+        created_at = parse_datetime(row.get("created_at"))
+        if not created_at:
+            reject(
+                report,
+                "invalid_date",
+                row,
+                raise_on_error,
+                "Row must contain valid 'name' and 'created_at'",
             )
-            if raise_on_error:
-                raise ValueError("Row must contain valid 'name' and 'created_at'")
-            skips += 1
             continue
-        catalogs.append(Catalog(name=name.strip(), created_at=created_at))
-        logger.info(f"Loaded catalog: {name.strip()} created at: {created_at}")
-        success += 1
-    logger.info(f"Successfully loaded {success} catalogs, {skips} Skipped entries")
-    return catalogs
+
+        if with_ids:
+            seen_ids.add(int(catalog_id))
+            catalogs["catalog_id"].append(int(catalog_id))
+        catalogs["name"].append(name)
+        catalogs["created_at"].append(created_at)
+        report.accept()
+        logger.debug("Loaded catalog: {} created at: {}", name, created_at)
+    report.close()
+    summary = report.summary()
+    logger.info(
+        "Loaded {} of {} catalogs, rejected {}",
+        summary.accepted,
+        summary.total_rows,
+        summary.reasons,
+    )
+    return catalogs, summary
 
 
-cached_catalogs = {}
+async def load_products(
+    file, raise_on_error=False, with_ids=False, known_catalogs=None, insert=None
+):
+    """
+    Returns the valid products as columns and a QualityReport of the rest.
+    Rows referencing a catalog outside `known_catalogs` are rejected when given.
+    Names are normalized, and a row repeating the normalized name and catalog
+    of an earlier row is rejected as `duplicate_product`. The `dedup_key`
+    column lets the insert skip products already in the database.
 
+    With `insert`, every ETL_CHUNK_SIZE valid products are awaited on it as
+    they are read instead of being returned, so only one chunk and the keys
+    are held in memory. It returns how many rows were stored, the rest are
+    counted as duplicates.
+    """
+    report = QualityReport("products")
+    dedup = Deduplicator(max_keys=settings.ETL_DEDUP_MAX_KEYS)
+    columns = ["name", "price", "created_at", "updated_at", "catalog_id", "dedup_key"]
+    if with_ids:
+        columns.append("product_id")
+    # Built column by column and handed to Product.bulk_create as is
+    products = {column: [] for column in columns}
+    skipped = 0
 
-async def load_products(file, raise_on_error=False):
-    file.seek(0)
-    df = pd.read_csv(file, parse_dates=["created_at", "updated_at"])
-    success, skips = 0, 0
-    products = []
-    for _, row in df.iterrows():
+    async def flush():
+        nonlocal products, skipped
+        rows = len(products["name"])
+        if rows:
+            skipped += rows - await insert(products)
+            products = {column: [] for column in columns}
+
+    seen_ids = set()
+    for row in read_feed(file, report, parse_dates=["created_at", "updated_at"]):
         name = row.get("name")
         price = row.get("price")
         catalog = row.get("catalog_id")
-        created_at = parse_datetime(row.get("created_at"))
-        updated_at = parse_datetime(row.get("updated_at"))
+        product_id = row.get("product_id") if with_ids else None
 
-        if not name or pd.isna(price):
-            logger.warning("Skipping row with missing 'name' or 'price'")
-            if raise_on_error:
-                raise ValueError("Row must contain 'name' and 'price'")
-            skips += 1
+        if with_ids and pd.isna(product_id):
+            reject(
+                report,
+                "missing_id",
+                row,
+                raise_on_error,
+                "Row must contain 'product_id'",
+            )
+            continue
+        if with_ids and int(product_id) in seen_ids:
+            reject(
+                report,
+                "duplicate_key",
+                row,
+                raise_on_error,
+                f"Duplicate product_id {int(product_id)}",
+            )
+            continue
+        name = None if pd.isna(name) else normalize_name(str(name))
+        if not name:
+            reject(
+                report,
+                "missing_name",
+                row,
+                raise_on_error,
+                "Row must contain 'name' and 'price'",
+            )
+            continue
+        if pd.isna(price):
+            reject(
+                report,
+                "missing_price",
+                row,
+                raise_on_error,
+                "Row must contain 'name' and 'price'",
+            )
             continue
-
         try:
             price = float(price)
         except ValueError:
-            logger.warning(f"Invalid price format for row: {row.to_dict()}")
-            if raise_on_error:
-                raise ValueError(f"Invalid price format for row: {row.to_dict()}")
-            skips += 1
+            reject(
+                report,
+                "invalid_price",
+                row,
+                raise_on_error,
+                f"Invalid price format for row: {row}",
+            )
             continue
-
+        created_at = parse_datetime(row.get("created_at"))
+        updated_at = parse_datetime(row.get("updated_at"))
         if not (created_at and updated_at):
-            logger.warning("Skipping row with invalid 'created_at' or 'updated_at'")
-            if raise_on_error:
-                raise ValueError(f"Invalid date format for row: {row.to_dict()}")
-            skips += 1
+            reject(
+                report,
+                "invalid_date",
+                row,
+                raise_on_error,
+                f"Invalid date format for row: {row}",
+            )
             continue
-
-        products.append(
-            Product(
-                name=name.strip(),
-                price=price,
-                created_at=created_at,
-                updated_at=updated_at,
-                catalog_id=catalog,
+        if pd.isna(catalog):
+            reject(
+                report,
+                "missing_catalog",
+                row,
+                raise_on_error,
+                "Row must contain 'catalog_id'",
             )
+            continue
+        catalog = int(catalog)
+        if known_catalogs is not None and catalog not in known_catalogs:
+            reject(
+                report,
+                "unknown_catalog",
+                row,
+                raise_on_error,
+                f"Unknown catalog_id {catalog}",
+            )
+            continue
+        key = dedup_key(name, catalog)
+        if not dedup.add(key):
+            reject(
+                report,
+                "duplicate_product",
+                row,
+                raise_on_error,
+                f"Duplicate product {name!r} in catalog {catalog}",
+            )
+            continue
+
+        if with_ids:
+            seen_ids.add(int(product_id))
+            products["product_id"].append(int(product_id))
+        products["name"].append(name)
+        products["price"].append(price)
+        products["created_at"].append(created_at)
+        products["updated_at"].append(updated_at)
+        products["catalog_id"].append(catalog)
+        products["dedup_key"].append(key)
+        report.accept()
+        logger.debug(
+            "Loaded product: {} with price: {} and catalog_id: {}", name, price, catalog
         )
+        if insert and len(products["name"]) >= settings.ETL_CHUNK_SIZE:
+            await flush()
+    if insert:
+        await flush()
+    report.close()
+    # Duplicates within the file, and those already stored by an earlier one
+    report.duplicates = dedup.duplicates + skipped
+    if dedup.overflowed:
         logger.info(
-            f"Loaded product: {name.strip()} with price: {price} and catalog_id: {catalog}"
+            "More than {} distinct products, later duplicates are left to the database",
+            dedup.max_keys,
         )
-        success += 1
-    logger.info(f"Successfully loaded {success} products, {skips} Skipped entries")
-    return products
+    summary = report.summary()
+    logger.info(
+        "Loaded {} of {} products, rejected {}",
+        summary.accepted,
+        summary.total_rows,
+        summary.reasons,
+    )
+    return products, summary
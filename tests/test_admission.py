@@ -0,0 +1,119 @@
+import asyncio
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from services.admission import (
+    AdmissionController,
+    AdmissionMiddleware,
+    Priority,
+    route_priority,
+)
+
+
+def test_route_priority():
+    assert route_priority("GET", "/api/v1/products") == Priority.READ
+    assert route_priority("POST", "/api/v1/products") == Priority.WRITE
+    assert route_priority("POST", "/api/v1/etl/products") == Priority.ETL
+
+
+@pytest.mark.asyncio
+async def test_queue_full_is_rejected_immediately():
+    controller = AdmissionController(capacity=1, max_queue=1, queue_timeout=1)
+    assert await controller.acquire(Priority.READ)
+
+    queued = asyncio.create_task(controller.acquire(Priority.READ))
+    await asyncio.sleep(0)
+    assert controller.stats()["queue_depth"] == 1
+
+    assert not await controller.acquire(Priority.READ)
+    assert controller.rejected["queue_full"] == 1
+
+    controller.release(Priority.READ)
+    assert await queued
+    assert controller.stats()["queue_depth"] == 0
+
+
+@pytest.mark.asyncio
+async def test_reads_are_admitted_before_etl():
+    controller = AdmissionController(capacity=1, max_queue=10, queue_timeout=1)
+    assert await controller.acquire(Priority.WRITE)
+
+    order = []
+
+    async def request(priority):
+        await controller.acquire(priority)
+        order.append(priority)
+        controller.release(priority)
+
+    etl = asyncio.create_task(request(Priority.ETL))
+    await asyncio.sleep(0)
+    read = asyncio.create_task(request(Priority.READ))
+    await asyncio.sleep(0)
+
+    controller.release(Priority.WRITE)
+    await asyncio.gather(etl, read)
+    assert order == [Priority.READ, Priority.ETL]
+
+
+@pytest.mark.asyncio
+async def test_saturated_middleware_returns_503_with_retry_after():
+    controller = AdmissionController(capacity=1, max_queue=0, queue_timeout=1)
+    release = asyncio.Event()
+
+    async def app(scope, receive, send):
+        await release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    transport = ASGITransport(app=AdmissionMiddleware(app, controller))
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        first = asyncio.create_task(client.get("/api/v1/products"))
+        await asyncio.sleep(0.01)
+        rejected = await client.get("/api/v1/products")
+        release.set()
+        assert (await first).status_code == 200
+
+    assert rejected.status_code == 503
+    assert rejected.headers["Retry-After"] == "1"
+    assert controller.stats()["rejected"] == {"queue_full": 1}
+    assert controller.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_admission_stats_endpoint(async_client):
+    response = await async_client.get("/api/v1/system/admission")
+    assert response.status_code == 200
+    assert {"queue_depth", "rejected", "capacity"} <= response.json().keys()
+
+
+@pytest.mark.asyncio
+async def test_coalesced_reads_share_one_slot(async_client, monkeypatch):
+    # One slot and no queue: any request needing its own slot would be rejected
+    controller = AdmissionController(capacity=1, max_queue=0, queue_timeout=1)
+    monkeypatch.setattr("services.admission.admission", controller)
+
+    responses = await asyncio.gather(
+        *(
+            async_client.get("/api/v1/products/top-products", params={"top_n": 10})
+            for _ in range(200)
+        )
+    )
+
+    assert [r.status_code for r in responses] == [200] * 200
+    assert controller.rejected == {}
+    assert 1 <= controller.admitted < 200
+    assert controller.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_rejected_coalesced_read_returns_503(async_client, monkeypatch):
+    controller = AdmissionController(capacity=1, max_queue=0, queue_timeout=1)
+    monkeypatch.setattr("services.admission.admission", controller)
+    assert await controller.acquire(Priority.WRITE)
+
+    response = await async_client.get("/api/v1/catalogs")
+    controller.release(Priority.WRITE)
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
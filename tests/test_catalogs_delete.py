@@ -0,0 +1,178 @@
+import asyncio
+
+import pytest
+
+from services.jobs import JobRegistry
+
+
+async def create_catalog_with_products(async_client, name, products=3):
+    catalog = (await async_client.post("/api/v1/catalogs", json={"name": name})).json()
+    for i in range(products):
+        response = await async_client.post(
+            "/api/v1/products",
+            json={
+                "name": f"{name} {i}",
+                "price": 1.0,
+                "catalog_id": catalog["catalog_id"],
+            },
+        )
+        assert response.status_code == 200
+    return catalog["catalog_id"]
+
+
+@pytest.mark.asyncio
+async def test_delete_catalog_removes_products_in_batches(async_client, monkeypatch):
+    monkeypatch.setattr("services.config.settings.CATALOG_DELETE_BATCH_SIZE", 2)
+    catalog_id = await create_catalog_with_products(async_client, "Doomed", products=5)
+
+    response = await async_client.delete(f"/api/v1/catalogs/{catalog_id}")
+    assert response.status_code == 200
+
+    assert (await async_client.get(f"/api/v1/catalogs/{catalog_id}")).status_code == 404
+    products = await async_client.get(f"/api/v1/products/catalog/{catalog_id}")
+    assert products.json() == []
+
+
+@pytest.mark.asyncio
+async def test_delete_catalog_reassigns_products(async_client):
+    source = await create_catalog_with_products(async_client, "Source", products=2)
+    target = await create_catalog_with_products(async_client, "Target", products=0)
+
+    response = await async_client.delete(
+        f"/api/v1/catalogs/{source}", params={"reassign_to": target}
+    )
+    assert response.status_code == 200
+
+    products = await async_client.get(f"/api/v1/products/catalog/{target}")
+    assert len(products.json()) == 2
+
+
+@pytest.mark.asyncio
+async def test_soft_delete_hides_catalog_and_keeps_products(async_client):
+    catalog_id = await create_catalog_with_products(async_client, "Hidden", products=1)
+
+    response = await async_client.delete(
+        f"/api/v1/catalogs/{catalog_id}", params={"soft": True}
+    )
+    assert response.status_code == 200
+    assert response.json()["deleted_at"] is not None
+
+    assert (await async_client.get(f"/api/v1/catalogs/{catalog_id}")).status_code == 404
+    catalogs = (await async_client.get("/api/v1/catalogs")).json()["items"]
+    assert catalog_id not in [c["catalog_id"] for c in catalogs]
+    products = await async_client.get(f"/api/v1/products/catalog/{catalog_id}")
+    assert len(products.json()) == 1
+
+
+@pytest.mark.asyncio
+async def test_job_registry_tracks_progress_and_failures():
+    registry = JobRegistry()
+
+    async def work(job):
+        job.processed += 5
+
+    async def fail(job):
+        raise ValueError("boom")
+
+    done = registry.spawn("work", work, total=5)
+    failed = registry.spawn("fail", fail)
+    await asyncio.sleep(0.01)
+
+    assert registry.get(done.job_id).status == "completed"
+    assert registry.get(done.job_id).processed == 5
+    assert registry.get(failed.job_id).status == "failed"
+    assert registry.get(failed.job_id).error == "boom"
+
+
+@pytest.mark.asyncio
+async def test_background_delete_runs_as_job(async_client):
+    catalog_id = await create_catalog_with_products(
+        async_client, "Background", products=3
+    )
+
+    response = await async_client.delete(
+        f"/api/v1/catalogs/{catalog_id}", params={"background": True}
+    )
+    assert response.status_code == 202
+    job = response.json()
+    assert job["kind"] == "delete_catalog"
+    assert job["total"] == 3
+    # Hidden before the job removes anything
+    assert (await async_client.get(f"/api/v1/catalogs/{catalog_id}")).status_code == 404
+
+    for _ in range(100):
+        job = (await async_client.get(f"/api/v1/system/jobs/{job['job_id']}")).json()
+        if job["status"] in ("completed", "failed"):
+            break
+        await asyncio.sleep(0.01)
+    assert job["status"] == "completed"
+    assert job["processed"] == 3
+    products = await async_client.get(f"/api/v1/products/catalog/{catalog_id}")
+    assert products.json() == []
+
+
+@pytest.mark.asyncio
+async def test_jobs_are_visible_to_other_workers(tmp_path):
+    started = JobRegistry(directory=tmp_path)
+    # Another worker, sharing the directory
+    other = JobRegistry(directory=tmp_path)
+    release = asyncio.Event()
+
+    async def work(job):
+        started.progress(job, 2)
+        await release.wait()
+
+    job = started.spawn("work", work, total=4)
+    await asyncio.sleep(0.01)
+    seen = other.get(job.job_id)
+    assert (seen.status, seen.processed, seen.total) == ("running", 2, 4)
+
+    release.set()
+    await asyncio.sleep(0.01)
+    assert other.get(job.job_id).status == "completed"
+    assert other.get("0" * 32) is None
+    assert other.get("../escape") is None
+
+
+@pytest.mark.asyncio
+async def test_reassigned_products_are_keyed_to_their_new_catalog(async_client):
+    source = await create_catalog_with_products(async_client, "Moved", products=1)
+    target = await create_catalog_with_products(async_client, "Target", products=0)
+
+    response = await async_client.delete(
+        f"/api/v1/catalogs/{source}", params={"reassign_to": target}
+    )
+    assert response.status_code == 200
+
+    duplicate = await async_client.post(
+        "/api/v1/products",
+        json={"name": "Moved  0", "price": 1.0, "catalog_id": target},
+    )
+    assert duplicate.status_code == 409
+    # The old catalog's key was released
+    other = await create_catalog_with_products(async_client, "Other", products=0)
+    moved_back = await async_client.post(
+        "/api/v1/products",
+        json={"name": "Moved 0", "price": 1.0, "catalog_id": other},
+    )
+    assert moved_back.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_reassign_conflict_leaves_catalog_untouched(async_client):
+    source = await create_catalog_with_products(async_client, "Lamp", products=2)
+    target = await create_catalog_with_products(async_client, "Target", products=0)
+    await async_client.post(
+        "/api/v1/products",
+        json={"name": "lamp 1", "price": 2.0, "catalog_id": target},
+    )
+
+    response = await async_client.delete(
+        f"/api/v1/catalogs/{source}", params={"reassign_to": target}
+    )
+    assert response.status_code == 409
+    assert "lamp 1" in response.json()["detail"]
+
+    assert (await async_client.get(f"/api/v1/catalogs/{source}")).status_code == 200
+    products = await async_client.get(f"/api/v1/products/catalog/{source}")
+    assert len(products.json()) == 2
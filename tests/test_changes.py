@@ -0,0 +1,143 @@
+import asyncio
+import json
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import SQLModel
+
+from models import ChangeLog
+from routers.changes import change_stream
+from services.changes import RESYNC, ChangeBus, change_bus
+
+
+@pytest_asyncio.fixture
+async def sqlite_engine(tmp_path):
+    """In a file, so sessions get their own connections."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'changes.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture(params=["sqlite_engine", "pg_engine"])
+def session_factory(request):
+    """A changelog of its own, on PostgreSQL too when available."""
+    engine = request.getfixturevalue(request.param)
+    return sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+
+
+def parse_events(body: str) -> list[dict]:
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append(fields)
+    return events
+
+
+@pytest.mark.asyncio
+async def test_changes_replay_from_sequence(async_client):
+    catalog = (
+        await async_client.post("/api/v1/catalogs", json={"name": "Feed"})
+    ).json()
+    product = (
+        await async_client.post(
+            "/api/v1/products",
+            json={"name": "Fed", "price": 2.5, "catalog_id": catalog["catalog_id"]},
+        )
+    ).json()
+    await async_client.delete(f"/api/v1/products/{product['product_id']}")
+
+    response = await async_client.get(
+        "/api/v1/changes", params={"since": 0, "follow": False}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    events = parse_events(response.text)
+    assert all(e["event"] == "change" for e in events)
+    assert [int(e["id"]) for e in events] == sorted(int(e["id"]) for e in events)
+    tail = [e["data"] for e in events[-3:]]
+    assert '"op": "create"' in tail[0] and '"entity": "catalog"' in tail[0]
+    assert '"op": "create"' in tail[1] and '"entity": "product"' in tail[1]
+    assert '"op": "delete"' in tail[2]
+
+    # Resuming after the second to last event only returns the last one
+    resumed = await async_client.get(
+        "/api/v1/changes",
+        params={"follow": False},
+        headers={"Last-Event-ID": events[-2]["id"]},
+    )
+    assert [e["id"] for e in parse_events(resumed.text)] == [events[-1]["id"]]
+
+
+@pytest.mark.asyncio
+async def test_committed_writes_are_published(async_client):
+    subscriber = change_bus.subscribe()
+    try:
+        response = await async_client.post("/api/v1/catalogs", json={"name": "Live"})
+        change = await asyncio.wait_for(subscriber.get(), 1)
+    finally:
+        change_bus.unsubscribe(subscriber)
+
+    assert change["entity"] == "catalog"
+    assert change["op"] == "create"
+    assert change["entity_id"] == response.json()["catalog_id"]
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_gets_resync_instead_of_blocking_writer():
+    bus = ChangeBus(buffer_size=2)
+    subscriber = bus.subscribe()
+
+    for seq in range(5):
+        bus.publish({"seq": seq})
+
+    assert await subscriber.get() is RESYNC
+    bus.publish({"seq": 5})
+    assert await asyncio.wait_for(subscriber.get(), 1) == {"seq": 5}
+
+
+@pytest.mark.asyncio
+async def test_seq_follows_commit_order(session_factory):
+    async with session_factory() as first, session_factory() as second:
+        ChangeLog.record(first, "product", "update", 1)
+        await first.flush()
+        ChangeLog.record(second, "product", "update", 2)
+        await second.commit()
+        # A reader at this point has seen product 2, and must still get
+        # product 1 when resuming after it
+        async with session_factory() as reader:
+            (seen,) = await ChangeLog.since(reader, 0)
+        await first.commit()
+
+    async with session_factory() as reader:
+        resumed = await ChangeLog.since(reader, seen.seq)
+    assert seen.entity_id == 2
+    assert [entry.entity_id for entry in resumed] == [1]
+
+
+@pytest.mark.asyncio
+async def test_pruned_position_gets_resync(session_factory, monkeypatch):
+    monkeypatch.setattr("services.config.settings.CHANGES_RETENTION", 3)
+    monkeypatch.setattr("models.changes.PRUNE_EVERY", 1)
+    for entity_id in range(6):
+        async with session_factory() as db:
+            ChangeLog.record(db, "product", "update", entity_id)
+            await db.commit()
+
+    async with session_factory() as db:
+        kept = await ChangeLog.since(db, 0)
+        last_seq = await ChangeLog.last_seq(db)
+    # Pruned before each insert, down to the retention
+    assert len(kept) == 4
+
+    events = [e async for e in change_stream(0, False, session_factory)]
+    assert events == [
+        f"event: resync\ndata: {json.dumps({'seq': last_seq, 'pruned': True})}\n\n"
+    ]
+    # A position still covered by the changelog replays as usual
+    events = [e async for e in change_stream(kept[0].seq - 1, False, session_factory)]
+    assert len(events) == 4
@@ -0,0 +1,49 @@
+import pandas as pd
+import pytest
+
+from models import Catalog, Product
+from models.columnar import batch_length, row_chunks
+
+
+def test_row_chunks_fill_defaults_once():
+    batch = {"name": ["a", "b", "c"], "price": [1.0, 2.0, 3.0], "catalog_id": [1, 1, 1]}
+    chunks = list(row_chunks(Product, batch, chunk_size=2))
+
+    assert [len(rows) for rows in chunks] == [2, 1]
+    rows = [row for rows in chunks for row in rows]
+    assert [row["name"] for row in rows] == ["a", "b", "c"]
+    # Defaults are computed once per batch, not per row
+    assert len({row["created_at"] for row in rows}) == 1
+    assert "product_id" not in rows[0]
+
+
+def test_row_chunks_reject_bad_batches():
+    with pytest.raises(ValueError, match="Unknown columns"):
+        list(row_chunks(Product, {"colour": ["red"]}))
+    with pytest.raises(ValueError, match="same length"):
+        batch_length({"name": ["a", "b"], "price": [1.0]})
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_accepts_columns_and_dataframes(db_session):
+    catalog = await Catalog.create(db_session, name="Columnar")
+    before = len(await Product.filter_by_catalog(db_session, catalog.catalog_id))
+
+    inserted = await Product.bulk_create(
+        db_session,
+        {
+            "name": ["x", "y"],
+            "price": [1.5, 2.5],
+            "catalog_id": [catalog.catalog_id] * 2,
+        },
+    )
+    assert inserted == 2
+
+    frame = pd.DataFrame(
+        {"name": ["z"], "price": [3.5], "catalog_id": [catalog.catalog_id]}
+    )
+    assert await Product.bulk_create(db_session, frame) == 1
+
+    products = await Product.filter_by_catalog(db_session, catalog.catalog_id)
+    assert len(products) == before + 3
+    assert sorted(p.price for p in products) == [1.5, 2.5, 3.5]
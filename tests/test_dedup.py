@@ -0,0 +1,118 @@
+import pytest
+
+from models import Product
+from shared.dedup import Deduplicator, dedup_key, normalize_name
+
+
+def test_normalize_name():
+    assert normalize_name("  Desk\tLamp \n") == "Desk Lamp"
+    # Full-width letters and a decomposed accent
+    assert normalize_name("ＬＡＭＰ Café") == "LAMP Café"
+
+
+def test_dedup_key_ignores_case_whitespace_and_unicode_form():
+    key = dedup_key("Café Lamp", 1)
+    assert dedup_key(" café   LAMP", 1) == key
+    assert dedup_key("Café Lamp", 2) != key
+    assert -(2**63) <= key < 2**63
+
+
+def test_deduplicator_memory_is_bounded():
+    dedup = Deduplicator(max_keys=2)
+    assert [dedup.add(key) for key in (1, 2, 1, 3, 3)] == [
+        True,
+        True,
+        False,
+        True,
+        True,
+    ]
+    # 3 was not remembered, its duplicate is left to the unique index
+    assert dedup.duplicates == 1
+    assert dedup.overflowed
+
+
+@pytest.mark.asyncio
+async def test_etl_skips_duplicates_in_file_and_database(async_client):
+    csv = (
+        "name,price,catalog_id,created_at,updated_at\n"
+        "Dedup Chair,10.00,1,2024-06-14 06:42:28,2024-08-29 09:09:02\n"
+        "  dedup   CHAIR ,12.00,1,2024-06-14 06:42:28,2024-08-29 09:09:02\n"
+        "Dedup Table,20.00,1,2024-06-14 06:42:28,2024-08-29 09:09:02\n"
+    )
+    files = {"file": ("products.csv", csv, "text/csv")}
+
+    first = (await async_client.post("/api/v1/etl/products", files=files)).json()
+    assert first["report"]["accepted"] == 2
+    assert first["report"]["reasons"] == {"duplicate_product": 1}
+    assert first["report"]["duplicates"] == 1
+
+    second = (await async_client.post("/api/v1/etl/products", files=files)).json()
+    assert second["report"]["duplicates"] == 3
+
+    products = await async_client.get("/api/v1/products/catalog/1")
+    names = [p["name"] for p in products.json()]
+    assert names.count("Dedup Chair") == 1
+    assert names.count("Dedup Table") == 1
+    assert "dedup_key" not in products.json()[0]
+
+
+@pytest.mark.asyncio
+async def test_created_and_renamed_products_keep_their_key(async_client):
+    created = await async_client.post(
+        "/api/v1/products", json={"name": "Keyed Lamp", "price": 1.0, "catalog_id": 1}
+    )
+    assert created.status_code == 200
+    other = await async_client.post(
+        "/api/v1/products", json={"name": "Other Lamp", "price": 1.0, "catalog_id": 1}
+    )
+
+    # Same product spelled differently
+    duplicate = await async_client.post(
+        "/api/v1/products", json={"name": " keyed  LAMP", "price": 2.0, "catalog_id": 1}
+    )
+    assert duplicate.status_code == 409
+    # An ETL file can no longer load it again
+    csv = (
+        "name,price,catalog_id,created_at,updated_at\n"
+        "Keyed Lamp,3.0,1,2024-06-14,2024-06-14\n"
+    )
+    files = {"file": ("products.csv", csv, "text/csv")}
+    loaded = (await async_client.post("/api/v1/etl/products", files=files)).json()
+    assert loaded["report"]["duplicates"] == 1
+
+    renamed = await async_client.patch(
+        f"/api/v1/products/{other.json()['product_id']}", json={"name": "Keyed Lamp"}
+    )
+    assert renamed.status_code == 409
+    renamed = await async_client.patch(
+        f"/api/v1/products/{other.json()['product_id']}", json={"name": "Renamed Lamp"}
+    )
+    assert renamed.status_code == 200
+    duplicate = await async_client.post(
+        "/api/v1/products", json={"name": "Renamed Lamp", "price": 2.0, "catalog_id": 1}
+    )
+    assert duplicate.status_code == 409
+
+
+@pytest.mark.asyncio
+async def test_etl_inserts_chunk_by_chunk(async_client, monkeypatch):
+    monkeypatch.setattr("services.config.settings.ETL_CHUNK_SIZE", 2)
+    chunks = []
+    bulk_create = Product.bulk_create
+
+    async def recording_bulk_create(db, products, skip_duplicates=False):
+        chunks.append(len(products["name"]))
+        return await bulk_create(db, products, skip_duplicates=skip_duplicates)
+
+    monkeypatch.setattr(Product, "bulk_create", recording_bulk_create)
+    rows = "".join(f"Chunked {i},1.0,1,2024-06-14,2024-06-14\n" for i in range(5))
+    csv = "name,price,catalog_id,created_at,updated_at\n" + rows
+    files = {"file": ("products.csv", csv, "text/csv")}
+
+    first = (await async_client.post("/api/v1/etl/products", files=files)).json()
+    assert chunks == [2, 2, 1]
+    assert first["report"]["accepted"] == 5
+    assert first["report"]["duplicates"] == 0
+
+    second = (await async_client.post("/api/v1/etl/products", files=files)).json()
+    assert second["report"]["duplicates"] == 5
@@ -0,0 +1,80 @@
+import pytest
+from sqlalchemy import Column, DateTime, Float, Integer, MetaData, String, Table
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from services.engine import verify_migrations
+from services.migrate import migrate, sync_url
+from shared.dedup import dedup_key
+
+
+def test_sync_url():
+    assert sync_url("postgresql+asyncpg://u:p@db/x") == "postgresql+psycopg2://u:p@db/x"
+    assert sync_url("sqlite+aiosqlite:////tmp/x.db") == "sqlite:////tmp/x.db"
+
+
+@pytest.mark.asyncio
+async def test_migrate_bootstraps_empty_database(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'empty.db'}"
+
+    assert migrate(url) == "created"
+    # A restart finds it at head and has nothing to do
+    assert migrate(url) == "upgraded"
+
+    engine = create_async_engine(url)
+    await verify_migrations(engine)
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_migrate_adopts_database_made_by_create_all(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'legacy.db'}"
+    # The tables the API created on startup before migrations were used
+    metadata = MetaData()
+    Table(
+        "catalog",
+        metadata,
+        Column("catalog_id", Integer, primary_key=True),
+        Column("name", String, nullable=False),
+        Column("created_at", DateTime, nullable=False),
+    )
+    Table(
+        "product",
+        metadata,
+        Column("product_id", Integer, primary_key=True),
+        Column("name", String, nullable=False),
+        Column("price", Float, nullable=False),
+        Column("created_at", DateTime, nullable=False),
+        Column("updated_at", DateTime, nullable=False),
+        Column("catalog_id", Integer, nullable=False),
+    )
+    legacy = create_engine(sync_url(url))
+    metadata.create_all(legacy)
+    with legacy.begin() as connection:
+        connection.execute(
+            text("INSERT INTO catalog VALUES (1, 'Catalog', CURRENT_TIMESTAMP)")
+        )
+        for product_id, name in ((1, "Lamp"), (2, "Chair"), (3, " lamp")):
+            connection.execute(
+                text(
+                    "INSERT INTO product VALUES "
+                    "(:id, :name, 1.0, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP, 1)"
+                ),
+                {"id": product_id, "name": name},
+            )
+
+    assert migrate(url) == "adopted"
+
+    columns = {column["name"] for column in inspect(legacy).get_columns("product")}
+    assert "dedup_key" in columns
+    assert "changelog" in inspect(legacy).get_table_names()
+    with legacy.connect() as connection:
+        keys = dict(
+            connection.execute(text("SELECT product_id, dedup_key FROM product")).all()
+        )
+    # The stored duplicate is left unkeyed
+    assert keys == {1: dedup_key("Lamp", 1), 2: dedup_key("Chair", 1), 3: None}
+    legacy.dispose()
+    engine = create_async_engine(url)
+    await verify_migrations(engine)
+    await engine.dispose()
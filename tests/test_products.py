@@ -35,7 +35,8 @@ async def test_create_product(async_client):
 async def test_delete_product(async_client):
     # First, create a product to delete
     create_response = await async_client.post(
-        "/api/v1/products", json={"name": "Test Product", "price": 9.9, "catalog_id": 1}
+        "/api/v1/products",
+        json={"name": "Deleted Product", "price": 9.9, "catalog_id": 1},
     )
     assert create_response.status_code == 200
     product = create_response.json()
@@ -49,3 +50,89 @@ async def test_delete_product(async_client):
     # Verify the product is deleted
     get_response = await async_client.get(f"/api/v1/products/{product['product_id']}")
     assert get_response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_products_total_tracks_writes(async_client):
+    response = await async_client.get("/api/v1/products", params={"limit": 1})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["estimated"] is False
+    assert data["total"] >= data["count"]
+    before = data["total"]
+
+    create_response = await async_client.post(
+        "/api/v1/products", json={"name": "Counted", "price": 1.0, "catalog_id": 1}
+    )
+    assert create_response.status_code == 200
+
+    # The cached total must be invalidated by the write
+    response = await async_client.get("/api/v1/products", params={"limit": 1})
+    assert response.json()["total"] == before + 1
+
+
+@pytest.mark.asyncio
+async def test_etl_products(async_client):
+    csv = (
+        "product_id,name,price,catalog_id,created_at,updated_at\n"
+        "1, Loaded Lamp ,19.99,1,2024-06-14 06:42:28,2024-08-29 09:09:02\n"
+        "2,,5.00,1,2024-06-14 06:42:28,2024-08-29 09:09:02\n"
+    )
+    response = await async_client.post(
+        "/api/v1/etl/products", files={"file": ("products.csv", csv, "text/csv")}
+    )
+    assert response.status_code == 200
+    report = response.json()["report"]
+    assert report["total_rows"] == 2
+    assert report["accepted"] == 1
+    assert report["reasons"] == {"missing_name": 1}
+
+    products = await async_client.get("/api/v1/products/catalog/1")
+    assert "Loaded Lamp" in [p["name"] for p in products.json()]
+
+
+@pytest.mark.asyncio
+async def test_etl_products_report(async_client, tmp_path, monkeypatch):
+    from services.config import settings
+
+    monkeypatch.setattr(settings, "ETL_REJECTS_DIR", str(tmp_path))
+    csv = (
+        "name,price,catalog_id,created_at,updated_at\n"
+        "Good,1.00,1,2024-06-14 06:42:28,2024-08-29 09:09:02\n"
+        "No price,,1,2024-06-14 06:42:28,2024-08-29 09:09:02\n"
+        "Bad price,abc,1,2024-06-14 06:42:28,2024-08-29 09:09:02\n"
+        "Bad date,2.00,1,yesterday,2024-08-29 09:09:02\n"
+        "Orphan,3.00,999,2024-06-14 06:42:28,2024-08-29 09:09:02\n"
+        "No catalog,4.00,,2024-06-14 06:42:28,2024-08-29 09:09:02\n"
+    )
+    response = await async_client.post(
+        "/api/v1/etl/products", files={"file": ("products.csv", csv, "text/csv")}
+    )
+    assert response.status_code == 200
+    report = response.json()["report"]
+    assert report["accepted"] == 1
+    assert report["rejected"] == 5
+    assert report["reasons"] == {
+        "missing_price": 1,
+        "invalid_price": 1,
+        "invalid_date": 1,
+        "unknown_catalog": 1,
+        "missing_catalog": 1,
+    }
+    assert report["null_counts"]["price"] == 1
+    assert [row["name"] for row in report["samples"]] == [
+        "No price",
+        "Bad price",
+        "Bad date",
+        "Orphan",
+        "No catalog",
+    ]
+
+    rejects = await async_client.get(report["rejects_url"])
+    assert rejects.status_code == 200
+    lines = rejects.text.strip().splitlines()
+    assert lines[0].endswith(",reason")
+    assert len(lines) == 6
+
+    missing = await async_client.get("/api/v1/etl/rejects/not-a-report")
+    assert missing.status_code == 404
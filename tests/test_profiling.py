@@ -0,0 +1,139 @@
+import asyncio
+import json
+import time
+
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+
+from main import app
+from services.config import settings
+from services.profiling import ProfileStore, ProfilingMiddleware, Sampler, Profile
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = ProfileStore(str(tmp_path), keep=2)
+    monkeypatch.setattr("routers.system.profile_store", store)
+    monkeypatch.setattr(settings, "PROFILING_TOKEN", "secret")
+    return store
+
+
+@pytest_asyncio.fixture
+async def profiled_client(async_client, store):
+    # async_client installs the test database overrides on `app`
+    profiled = ProfilingMiddleware(
+        app, store=store, sampler=Sampler(0.001), token="secret"
+    )
+    transport = ASGITransport(app=profiled)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+@pytest.mark.asyncio
+async def test_profile_captures_sql_timeline(profiled_client, store):
+    response = await profiled_client.get(
+        "/api/v1/catalogs", headers={"X-Profile-Token": "secret"}
+    )
+    assert response.status_code == 200
+    profile_id = response.headers["x-profile-id"]
+
+    profile = json.loads(store.path(profile_id).read_text())
+    assert profile["path"] == "/api/v1/catalogs"
+    assert profile["status"] == 200
+    assert profile["queries"] == len(profile["sql"]) > 0
+    assert all(query["duration"] >= 0 for query in profile["sql"])
+
+
+@pytest.mark.asyncio
+async def test_requests_are_not_profiled_without_the_token(profiled_client, store):
+    for headers in ({}, {"X-Profile-Token": "wrong"}):
+        response = await profiled_client.get("/api/v1/catalogs", headers=headers)
+        assert response.status_code == 200
+        assert "x-profile-id" not in response.headers
+    assert store.list() == []
+
+
+@pytest.mark.asyncio
+async def test_sampler_records_only_its_own_task():
+    sampler = Sampler(0.001)
+
+    def busy(seconds: float):
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            pass
+
+    async def profiled():
+        profile = Profile("GET", "/busy")
+        sampler.start(profile)
+        await asyncio.sleep(0)
+        busy(0.05)
+        await asyncio.sleep(0.05)  # the other task runs meanwhile
+        sampler.stop(profile)
+        return profile
+
+    async def other():
+        await asyncio.sleep(0.01)
+        busy(0.03)
+
+    profile, _ = await asyncio.gather(profiled(), other())
+    stacks = "\n".join(profile.samples)
+    assert "busy" in stacks
+    assert "other" not in stacks
+
+
+@pytest.mark.asyncio
+async def test_profile_endpoints_require_the_token(
+    profiled_client, async_client, store
+):
+    for _ in range(3):
+        await profiled_client.get(
+            "/api/v1/catalogs", headers={"X-Profile-Token": "secret"}
+        )
+
+    assert (await async_client.get("/api/v1/system/profiles")).status_code == 403
+    headers = {"X-Profile-Token": "secret"}
+    profiles = (
+        await async_client.get("/api/v1/system/profiles", headers=headers)
+    ).json()
+    # The ring only keeps the newest profiles
+    assert len(profiles) == 2
+
+    profile_id = profiles[0]["profile_id"]
+    download = await async_client.get(
+        f"/api/v1/system/profiles/{profile_id}", headers=headers
+    )
+    assert download.status_code == 200
+    assert "stacks" in download.json()
+    missing = await async_client.get(
+        "/api/v1/system/profiles/" + "0" * 32, headers=headers
+    )
+    assert missing.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_overhead_when_not_profiling_is_negligible(tmp_path):
+    async def endpoint(scope, receive, send):
+        pass
+
+    wrapped = ProfilingMiddleware(
+        endpoint, store=ProfileStore(str(tmp_path)), sampler=Sampler(), token="secret"
+    )
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/api/v1/products",
+        "headers": [(b"host", b"test"), (b"accept", b"*/*"), (b"user-agent", b"test")],
+    }
+
+    async def timed(target, calls=20_000) -> float:
+        started = time.perf_counter()
+        for _ in range(calls):
+            await target(scope, None, None)
+        return (time.perf_counter() - started) / calls
+
+    bare = min([await timed(endpoint) for _ in range(3)])
+    profiled = min([await timed(wrapped) for _ in range(3)])
+    # A few microseconds per request, against milliseconds for a real one
+    assert profiled - bare < 10e-6
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,87 @@
+import pytest
+from sqlalchemy import text
+
+from models import Catalog, Product
+from services.reload import FullReload, ReloadError
+
+
+@pytest.mark.asyncio
+async def test_reload_validation_reports_quality_problems(db_session):
+    reload = FullReload(Product)
+    batch = {
+        "product_id": [1, 1],
+        "name": ["Kept", None],
+        "price": [1.0, 2.0],
+        "catalog_id": [None, -1],
+    }
+    await reload.prepare(db_session)
+    rows = await reload.load(db_session, batch)
+
+    with pytest.raises(ReloadError) as error:
+        await reload.validate(db_session, expected_rows=rows)
+
+    report = error.value.report
+    assert report["rows"] == 2
+    assert report["nulls"]["name"] == 1
+    assert report["nulls"]["catalog_id"] == 1
+    assert report["duplicate_keys"] == 1
+    assert report["orphans"]["product.catalog_id"] == 1
+
+
+@pytest.mark.asyncio
+async def test_reload_validation_reports_duplicate_dedup_keys(db_session):
+    catalog = await Catalog.create(db_session, name="Lamps")
+    reload = FullReload(Product)
+    # As staged once the loader's Deduplicator stopped remembering keys
+    batch = {
+        "product_id": [1, 2, 3],
+        "name": ["Lamp", "lamp", "Chair"],
+        "price": [1.0, 1.0, 1.0],
+        "catalog_id": [catalog.catalog_id] * 3,
+        "dedup_key": [7, 7, None],
+    }
+    await reload.prepare(db_session)
+    rows = await reload.load(db_session, batch)
+
+    with pytest.raises(ReloadError, match="1 duplicate dedup_key values") as error:
+        await reload.validate(db_session, expected_rows=rows)
+    assert error.value.report["duplicate_keys"] == 0
+    assert error.value.report["duplicate_values"] == {"dedup_key": 1}
+
+
+@pytest.mark.asyncio
+async def test_catalog_reload_must_keep_product_parents(db_session):
+    catalog = await Catalog.create(db_session, name="Parent")
+    await Product.create(
+        db_session, name="Child", price=1.0, catalog_id=catalog.catalog_id
+    )
+
+    reload = FullReload(Catalog)
+    await reload.prepare(db_session)
+    # The feed no longer contains the product's catalog
+    await reload.load(db_session, {"catalog_id": [-5], "name": ["Other"]})
+    with pytest.raises(ReloadError, match="orphaned product.catalog_id"):
+        await reload.validate(db_session, expected_rows=1)
+
+    # The live table is untouched by a failed load
+    live = await db_session.scalar(
+        text("SELECT count(*) FROM catalog WHERE name = 'Parent'")
+    )
+    assert live == 1
+
+
+@pytest.mark.asyncio
+async def test_full_reload_requires_postgresql(async_client):
+    response = await async_client.post(
+        "/api/v1/etl/catalogs",
+        params={"mode": "full"},
+        files={
+            "file": (
+                "catalogs.csv",
+                b"catalog_id,name,created_at\n1,A,2024-01-01\n",
+                "text/csv",
+            )
+        },
+    )
+    assert response.status_code == 400
+    assert "PostgreSQL" in response.json()["detail"]
@@ -0,0 +1,142 @@
+"""Full reloads against a real PostgreSQL, the only database they support."""
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+from models import Catalog, Product
+from services.reload import FullReload, ReloadError
+
+
+def catalogs(*names):
+    now = datetime.now()
+    return {
+        "catalog_id": list(range(1, len(names) + 1)),
+        "name": list(names),
+        "created_at": [now] * len(names),
+    }
+
+
+def products(*names, catalog_id=1):
+    now = datetime.now()
+    return {
+        "product_id": list(range(1, len(names) + 1)),
+        "name": list(names),
+        "price": [1.0] * len(names),
+        "created_at": [now] * len(names),
+        "updated_at": [now] * len(names),
+        "catalog_id": [catalog_id] * len(names),
+    }
+
+
+async def names(db, table):
+    rows = await db.scalars(text(f"SELECT name FROM {table} ORDER BY name"))
+    return rows.all()
+
+
+async def foreign_keys(db, table):
+    """{constraint name: referenced table} of `table`."""
+    rows = await db.execute(
+        text(
+            "SELECT conname, confrelid::regclass::text FROM pg_constraint "
+            "WHERE conrelid = to_regclass(:t) AND contype = 'f'"
+        ),
+        {"t": table},
+    )
+    return dict(rows.all())
+
+
+@pytest.mark.asyncio
+async def test_reload_rollback_reload_both_tables(pg_session):
+    db = pg_session
+    catalog = FullReload(Catalog)
+    product = FullReload(Product)
+
+    await catalog.run(db, catalogs("Catalog v1", "Other v1"))
+    await product.run(db, products("Product v1"))
+    await catalog.run(db, catalogs("Catalog v2", "Other v2"))
+    await product.run(db, products("Product v2", catalog_id=2))
+    assert await names(db, "catalog") == ["Catalog v2", "Other v2"]
+    assert await names(db, "product") == ["Product v2"]
+
+    await catalog.rollback(db)
+    await product.rollback(db)
+    assert await names(db, "catalog") == ["Catalog v1", "Other v1"]
+    assert await names(db, "product") == ["Product v1"]
+    assert await names(db, "catalog_previous") == ["Catalog v2", "Other v2"]
+
+    await catalog.run(db, catalogs("Catalog v3"))
+    await product.run(db, products("Product v3"))
+    assert await names(db, "catalog") == ["Catalog v3"]
+    assert await names(db, "product") == ["Product v3"]
+    assert await foreign_keys(db, "product") == {"product_catalog_id_fkey": "catalog"}
+
+    # The serial sequence moved along with the live table
+    created = await Catalog.create(db, name="Created")
+    assert created.catalog_id == 2
+
+
+@pytest.mark.asyncio
+async def test_rolled_back_table_references_live_parents(pg_session):
+    db = pg_session
+    catalog = FullReload(Catalog)
+    product = FullReload(Product)
+    await catalog.run(db, catalogs("Catalog v1"))
+    await product.run(db, products("Product v1"))
+
+    await product.run(db, products("Product v2"))
+    await catalog.run(db, catalogs("Catalog v2"))
+    # The restored products were loaded while catalog v1 was live
+    await product.rollback(db)
+    assert await foreign_keys(db, "product") == {"product_catalog_id_fkey": "catalog"}
+
+    # Drops catalog_previous, which must not take the live constraint with it
+    await catalog.run(db, catalogs("Catalog v3"))
+    assert await foreign_keys(db, "product") == {"product_catalog_id_fkey": "catalog"}
+    with pytest.raises(IntegrityError):
+        await Product.create(db, name="Orphan", price=1.0, catalog_id=404)
+
+
+@pytest.mark.asyncio
+async def test_previous_version_does_not_block_catalog_delete(pg_session):
+    db = pg_session
+    product = FullReload(Product)
+    await FullReload(Catalog).run(db, catalogs("Kept", "Dropped"))
+    await product.run(db, products("Old", catalog_id=2))
+    await product.run(db, products("New", catalog_id=1))
+    assert await foreign_keys(db, "product_previous") == {}
+
+    # Only the replaced products referenced it
+    dropped = await Catalog.get_by_id(db, 2)
+    await dropped.delete(db)
+    assert await names(db, "catalog") == ["Kept"]
+
+    with pytest.raises(ReloadError, match="1 orphaned product.catalog_id") as error:
+        await product.rollback(db)
+    assert error.value.report["orphans"]["product.catalog_id"] == 1
+    assert await names(db, "product") == ["New"]
+
+
+@pytest.mark.asyncio
+async def test_rollback_refuses_to_orphan_rows(pg_session):
+    db = pg_session
+    catalog = FullReload(Catalog)
+    product = FullReload(Product)
+    await catalog.run(db, catalogs("One", "Two"))
+    await product.run(db, products("Old", catalog_id=2))
+    await product.run(db, products("New", catalog_id=1))
+    # Catalog 2 is gone, the previous products still point at it
+    await catalog.run(db, catalogs("One v2"))
+
+    with pytest.raises(ReloadError, match="orphaned product.catalog_id"):
+        await product.rollback(db)
+    assert await names(db, "product") == ["New"]
+
+    # The other way round: catalog_previous lacks a catalog live products use
+    await catalog.run(db, catalogs("One v3", "Two v3"))
+    await product.run(db, products("Newer", catalog_id=2))
+    with pytest.raises(ReloadError, match="orphaned product.catalog_id"):
+        await catalog.rollback(db)
+    assert await names(db, "catalog") == ["One v3", "Two v3"]
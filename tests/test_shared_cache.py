@@ -0,0 +1,89 @@
+import multiprocessing
+
+import pytest
+from fastapi.responses import JSONResponse
+
+from models import Catalog
+from services.config import Settings
+from services.counting import CountService
+from services.shared_cache import SharedCache, SharedVersions, shared_versions
+
+
+def _bump(path, namespace, times):
+    versions = SharedVersions(path)
+    for _ in range(times):
+        versions.bump(namespace)
+
+
+def test_versions_are_shared_between_processes(tmp_path):
+    path = tmp_path / "versions"
+    versions = SharedVersions(path)
+    workers = [
+        multiprocessing.Process(target=_bump, args=(path, "product", 100))
+        for _ in range(2)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    # Seen through the mapping, increments of both processes are kept
+    assert versions.get("product") == 200
+    assert versions.get("catalog") == 0
+
+
+@pytest.mark.asyncio
+async def test_cache_entries_follow_versions(tmp_path):
+    versions = SharedVersions(tmp_path / "versions")
+    cache = SharedCache(tmp_path, versions, ttl=60)
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        return {"items": [calls]}
+
+    assert await cache.fetch(("product",), ("top", 10), fetch) == {"items": [1]}
+    hit = await cache.fetch(("product",), ("top", 10), fetch)
+    assert isinstance(hit, JSONResponse)
+    assert hit.body == b'{"items":[1]}'
+    # Another worker sharing the directory sees the entry as well
+    other = SharedCache(tmp_path, SharedVersions(tmp_path / "versions"), ttl=60)
+    assert isinstance(await other.fetch(("product",), ("top", 10), fetch), JSONResponse)
+    assert calls == 1
+
+    versions.bump("catalog")
+    assert isinstance(await cache.fetch(("product",), ("top", 10), fetch), JSONResponse)
+    versions.bump("product")
+    assert await cache.fetch(("product",), ("top", 10), fetch) == {"items": [2]}
+
+
+@pytest.mark.asyncio
+async def test_commits_bump_shared_versions(async_client):
+    before = shared_versions.get("catalog"), shared_versions.get("changelog")
+    response = await async_client.post("/api/v1/catalogs", json={"name": "Versioned"})
+    assert response.status_code == 200
+    after = shared_versions.get("catalog"), shared_versions.get("changelog")
+    assert after == (before[0] + 1, before[1] + 1)
+
+
+@pytest.mark.asyncio
+async def test_count_cache_drops_totals_changed_by_other_workers(db_session):
+    versions = SharedVersions()
+    counts = CountService(ttl=60, versions=versions)
+    total, _ = await counts.total(db_session, Catalog)
+
+    await Catalog.create(db_session, name="Counted elsewhere")
+    # Not invalidated locally, still the cached total
+    assert (await counts.total(db_session, Catalog))[0] == total
+    versions.bump("catalog")
+    assert (await counts.total(db_session, Catalog))[0] == total + 1
+
+
+def test_pool_is_split_by_connection_budget():
+    def limits(**values):
+        return Settings(DATABASE_URL="sqlite://", **values).pool_limits
+
+    assert limits() == (20, 30)
+    assert limits(WORKERS=4) == (4, 8)
+    assert sum(limits(WORKERS=4, DB_CONNECTION_BUDGET=100)) == 25
+    assert limits(WORKERS=4, DB_POOL_SIZE=10) == (10, 2)
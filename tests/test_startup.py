@@ -0,0 +1,73 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from services.engine import verify_migrations
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Budgets in seconds, generous enough for slow CI machines
+IMPORT_BUDGET = 2.0
+FIRST_REQUEST_BUDGET = 4.0
+
+COLD_START = """
+import json, os, sys, time
+
+started = time.perf_counter()
+import main
+imported = time.perf_counter() - started
+
+import asyncio
+from httpx import ASGITransport, AsyncClient
+
+async def first_request():
+    async with main.lifespan(main.app):
+        transport = ASGITransport(app=main.app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            return (await client.get("/api/v1/catalogs")).status_code
+
+status = asyncio.run(first_request())
+print(json.dumps({
+    "import": imported,
+    "first_request": time.perf_counter() - started,
+    "status": status,
+    "etl_modules": sorted(m for m in ("pandas", "loguru") if m in sys.modules),
+    "loguru_level": os.environ.get("LOGURU_LEVEL"),
+}))
+"""
+
+
+def test_cold_start_budget(tmp_path):
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite+aiosqlite:///{tmp_path / 'startup.db'}",
+        "DB_STARTUP_MODE": "create_all",
+        "LOG_LEVEL": "WARNING",
+    }
+    result = subprocess.run(
+        [sys.executable, "-c", COLD_START],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+
+    assert timings["status"] == 200
+    # The catalog list must not drag in the ETL dependencies
+    assert timings["etl_modules"] == []
+    # Logging is configured for when the ETL loads loguru
+    assert timings["loguru_level"] == "WARNING"
+    assert timings["import"] < IMPORT_BUDGET
+    assert timings["first_request"] < FIRST_REQUEST_BUDGET
+
+
+@pytest.mark.asyncio
+async def test_verify_migrations_rejects_unversioned_database(engine):
+    with pytest.raises(RuntimeError, match="alembic upgrade head"):
+        await verify_migrations(engine)